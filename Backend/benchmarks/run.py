@@ -0,0 +1,350 @@
+"""Banc d'essai de l'API QHSE.
+
+Pour chaque volume (--sizes), la base est remplie de données synthétiques
+reproductibles (EPI, formations, incidents), l'API est lancée avec uvicorn
+comme en production, puis chaque scénario (listes, créations, import en
+masse, dashboard) est joué avec --concurrency requêtes en parallèle.
+Résultat : débit, latences p50/p95/p99 et temps SQL moyen par requête (lu
+sur /metrics). Avec --baseline, une régression au-delà de --tolerance fait
+échouer la commande (code 1), à lancer avant un déploiement.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run.py --database-url postgresql://localhost/qhse_bench \\
+        --sizes 1000 100000 --output bench.json --baseline reference.json
+
+ATTENTION : les tables epi, formations et incidents de la base visée sont
+vidées. Utiliser une base dédiée (BENCH_DATABASE_URL), jamais DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+import psycopg
+from psycopg.rows import dict_row
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from main import init_db  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+BULK_ROWS = 500
+STARTUP_TIMEOUT = 600
+
+
+# ================================
+# 🔵 JEUX DE DONNÉES
+# ================================
+# Générés côté serveur (generate_series) : valeurs déterminées par le numéro
+# de ligne, échéances réparties sur deux ans autour d'aujourd'hui.
+SEED_QUERIES = {
+    "epi": """
+        INSERT INTO epi (id, employe, departement, typeEPI, marque, taille, dateRemise, dateExpiration, statut)
+        SELECT 'bench-' || i, 'Employé ' || i,
+               (ARRAY['Production', 'Maintenance', 'Logistique', 'QHSE', 'Administration'])[1 + i %% 5],
+               (ARRAY['Casque', 'Gants', 'Chaussures de sécurité', 'Lunettes', 'Harnais'])[1 + i %% 5],
+               (ARRAY['3M', 'Honeywell', 'Delta Plus', 'MSA'])[1 + i %% 4],
+               (ARRAY['S', 'M', 'L', 'XL'])[1 + i %% 4],
+               current_date - 365 + (i * 7) %% 365,
+               current_date - 365 + (i * 37) %% 730,
+               (ARRAY['En service', 'En stock', 'Hors service'])[1 + i %% 3]
+        FROM generate_series(1, %s) AS i
+    """,
+    "formations": """
+        INSERT INTO formations (id, nom, prenom, departement, fonction, typeFormation, intitule,
+                                centreFormation, dateFormation, dateExpiration)
+        SELECT 'bench-' || i, 'Nom ' || i, 'Prénom ' || i,
+               (ARRAY['Production', 'Maintenance', 'Logistique', 'QHSE', 'Administration'])[1 + i %% 5],
+               (ARRAY['Opérateur', 'Technicien', 'Chef d''équipe', 'Ingénieur'])[1 + i %% 4],
+               (ARRAY['Habilitation', 'Sécurité', 'Environnement'])[1 + i %% 3],
+               (ARRAY['Habilitation électrique', 'Travail en hauteur', 'SST', 'Incendie'])[1 + i %% 4],
+               (ARRAY['APAVE', 'Bureau Veritas', 'Interne'])[1 + i %% 3],
+               current_date - 730 + (i * 11) %% 730,
+               current_date - 365 + (i * 37) %% 730
+        FROM generate_series(1, %s) AS i
+    """,
+    "incidents": """
+        INSERT INTO incidents (id, type, typeIncident, gravite, date, heure, lieu, description,
+                               personne, temoin, action, statut)
+        SELECT 'bench-' || i,
+               (ARRAY['accident', 'presqu_accident', 'incident'])[1 + i %% 3],
+               (ARRAY['Chute', 'Coupure', 'Brûlure', 'Déversement'])[1 + i %% 4],
+               (ARRAY['faible', 'moyenne', 'grave'])[1 + i %% 3],
+               current_date - (i * 13) %% 730,
+               lpad((i %% 24)::text, 2, '0') || ':00',
+               'Zone ' || (i %% 50),
+               'Incident synthétique n°' || i,
+               'Employé ' || (i %% 1000),
+               NULL, NULL,
+               (ARRAY['Ouvert', 'En cours', 'Clôturé'])[1 + i %% 3]
+        FROM generate_series(1, %s) AS i
+    """,
+}
+
+
+async def seed(database_url, size):
+    async with await psycopg.AsyncConnection.connect(
+        database_url, autocommit=True, row_factory=dict_row
+    ) as conn:
+        await init_db(conn)
+        async with conn.transaction():
+            await conn.execute("TRUNCATE epi, formations, incidents")
+            await conn.execute(
+                "DELETE FROM deleted_rows WHERE module IN ('epi', 'formations', 'incidents')"
+            )
+            for query in SEED_QUERIES.values():
+                await conn.execute(query, (size,))
+        for table in SEED_QUERIES:
+            await conn.execute(f"ANALYZE {table}")
+
+
+# ================================
+# 🔵 SERVEUR
+# ================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url, workdir):
+    """uvicorn dans un sous-processus, lancé hors de Backend/ pour ne pas
+    toucher au dossier uploads/ du dépôt."""
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "SLOW_REQUEST_SECONDS": ""}
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--app-dir", BACKEND_DIR, "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(process, base_url):
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() - start < STARTUP_TIMEOUT:
+            if process.poll() is not None:
+                raise RuntimeError(f"Le serveur s'est arrêté (code {process.returncode})")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Le serveur n'a pas démarré à temps")
+
+
+# ================================
+# 🔵 SCÉNARIOS
+# ================================
+# Chaque scénario renvoie, pour le numéro de requête i, les arguments de
+# httpx.AsyncClient.request. `ratio` réduit le nombre de requêtes des
+# scénarios lourds (import en masse).
+def epi_payload(i, prefix):
+    return {
+        "id": f"{prefix}-{i}",
+        "employe": f"Employé bench {i}",
+        "departement": "Production",
+        "typeEPI": "Casque",
+        "marque": "MSA",
+        "taille": "L",
+        "dateRemise": "2026-01-01",
+        "dateExpiration": "2027-01-01",
+        "statut": "En service",
+    }
+
+
+SCENARIOS = {
+    "liste_epi": {"request": lambda i, run: ("GET", "/api/epi", {"params": {"limit": 100}})},
+    "liste_epi_filtre": {
+        "request": lambda i, run: (
+            "GET", "/api/epi",
+            {"params": {"departement": "Production", "sort": "-dateExpiration", "limit": 100}},
+        ),
+    },
+    "liste_formations": {
+        "request": lambda i, run: (
+            "GET", "/api/formations", {"params": {"sort": "dateExpiration", "limit": 100}}
+        ),
+    },
+    "liste_incidents": {
+        "request": lambda i, run: (
+            "GET", "/api/incidents", {"params": {"statut": "En cours", "sort": "-date", "limit": 100}}
+        ),
+    },
+    "creation_epi": {
+        "request": lambda i, run: ("POST", "/api/epi", {"json": epi_payload(i, f"bench-new-{run}")}),
+    },
+    "import_epi": {
+        "ratio": 10,
+        "request": lambda i, run: (
+            "POST", "/api/epi/bulk",
+            {"json": [epi_payload(j, f"bench-bulk-{run}-{i}") for j in range(BULK_ROWS)]},
+        ),
+    },
+    "dashboard": {"request": lambda i, run: ("GET", "/api/dashboard/summary", {})},
+    "expirations": {"request": lambda i, run: ("GET", "/api/expirations", {"params": {"within": "30d"}})},
+}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def run_scenario(client, scenario, count, concurrency):
+    run = uuid.uuid4().hex[:8]
+    latencies, errors = [], 0
+    counter = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = scenario["request"](i, run)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requetes": count,
+        "erreurs": errors,
+        "debit": round(count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "moyenne_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+METRIC_LINE = re.compile(r'^qhse_http_request_db_seconds_(sum|count)\{method="(\w+)",route="([^"]+)"\} (\S+)$')
+
+
+async def sql_time_by_route(client):
+    """Temps SQL moyen (ms) par méthode + route, d'après /metrics."""
+    totals = {}
+    for line in (await client.get("/metrics")).text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, method, route, value = match.groups()
+            totals.setdefault(f"{method} {route}", {})[kind] = float(value)
+    return {
+        key: round(values["sum"] / values["count"] * 1000, 2)
+        for key, values in totals.items()
+        if values.get("count")
+    }
+
+
+async def bench_size(args, size, workdir):
+    print(f"\n=== {size} lignes par table ===", flush=True)
+    start = time.perf_counter()
+    await seed(args.database_url, size)
+    print(f"données générées en {time.perf_counter() - start:.1f}s", flush=True)
+
+    process, base_url = start_server(args.database_url, workdir)
+    try:
+        startup = await wait_ready(process, base_url)
+        results = {"demarrage_s": round(startup, 2), "scenarios": {}}
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            for name, scenario in SCENARIOS.items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                count = max(args.requests // scenario.get("ratio", 1), args.concurrency)
+                stats = await run_scenario(client, scenario, count, args.concurrency)
+                results["scenarios"][name] = stats
+                print(
+                    f"{name:<18} {stats['debit']:>9.1f} req/s  p50 {stats['p50_ms']:>8.2f} ms  "
+                    f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms  "
+                    f"erreurs {stats['erreurs']}",
+                    flush=True,
+                )
+            results["sql_ms_par_route"] = await sql_time_by_route(client)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+# ================================
+# 🔵 COMPARAISON
+# ================================
+def compare(results, baseline, tolerance):
+    """Régressions par rapport à une exécution de référence (p95 et débit)."""
+    regressions = []
+    for size, current in results.items():
+        reference = baseline.get(size)
+        if not reference:
+            continue
+        for name, stats in current["scenarios"].items():
+            ref = reference["scenarios"].get(name)
+            if not ref:
+                continue
+            if stats["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{size} / {name} : p95 {ref['p95_ms']} -> {stats['p95_ms']} ms")
+            if stats["debit"] < ref["debit"] * (1 - tolerance):
+                regressions.append(f"{size} / {name} : débit {ref['debit']} -> {stats['debit']} req/s")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'API QHSE")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="base PostgreSQL dédiée (défaut : BENCH_DATABASE_URL)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="lignes par table (défaut : 1000 100000 1000000)")
+    parser.add_argument("--requests", type=int, default=200, help="requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=10, help="requêtes simultanées")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), help="sous-ensemble de scénarios")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="écart toléré (0.2 = 20 %%)")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url ou BENCH_DATABASE_URL est requis")
+    return args
+
+
+async def main():
+    args = parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="qhse-bench-") as workdir:
+        for size in args.sizes:
+            results[str(size)] = await bench_size(args, size, workdir)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRégressions :")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\nAucune régression par rapport à la référence.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import csv
+import io
+from datetime import date
+
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+
+# ================================
+# 🔵 ÉCRIVAINS D'EXPORT
+# ================================
+# Chaque écrivain reçoit les lignes par lots (listes de valeurs déjà mises en
+# forme) et n'en garde aucune en mémoire : le CSV est rendu lot par lot, le
+# XLSX passe par le mode write_only d'openpyxl (fichier temporaire), le PDF
+# est dessiné page par page.
+class CsvTableWriter:
+    """CSV `;` + BOM UTF-8, lisible tel quel par Excel en français."""
+
+    def __init__(self, labels):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, delimiter=";")
+        self.buffer.write("\ufeff")
+        self.writer.writerow(labels)
+
+    def add_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def flush(self):
+        chunk = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+class XlsxTableWriter:
+    def __init__(self, path, sheet, labels):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet[:31])
+        self.sheet.append(labels)
+
+    def add_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class PdfTableWriter:
+    """Tableau paginé en A4 paysage, en-tête répété sur chaque page."""
+
+    PAGE_SIZE = landscape(A4)
+    MARGIN = 30
+    ROW_HEIGHT = 14
+    FONT_SIZE = 7
+    HEADER_COLOR = (59 / 255, 130 / 255, 246 / 255)
+    STRIPE_COLOR = (248 / 255, 250 / 255, 252 / 255)
+
+    def __init__(self, path, title, labels):
+        self.canvas = canvas.Canvas(path, pagesize=self.PAGE_SIZE)
+        self.canvas.setTitle(title)
+        self.title = title
+        self.labels = labels
+        self.width = self.PAGE_SIZE[0] - 2 * self.MARGIN
+        self.column_width = self.width / len(labels)
+        self.page = 0
+        self.new_page()
+
+    def new_page(self):
+        if self.page:
+            self.canvas.showPage()
+        self.page += 1
+        page_width, page_height = self.PAGE_SIZE
+        c = self.canvas
+        c.setFillColorRGB(40 / 255, 40 / 255, 40 / 255)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(self.MARGIN, page_height - self.MARGIN, self.title)
+        c.setFillColorRGB(100 / 255, 100 / 255, 100 / 255)
+        c.setFont("Helvetica", 8)
+        c.drawString(self.MARGIN, page_height - self.MARGIN - 14, f"Généré le {date.today():%d/%m/%Y}")
+        c.drawRightString(page_width - self.MARGIN, page_height - self.MARGIN - 14, f"Page {self.page}")
+        self.y = page_height - self.MARGIN - 40
+        self.rows_on_page = 0
+        self.draw_row(self.labels, font="Helvetica-Bold", fill=self.HEADER_COLOR, color=(1, 1, 1))
+
+    def draw_row(self, values, font="Helvetica", fill=None, color=(0.2, 0.2, 0.2)):
+        c = self.canvas
+        if fill:
+            c.setFillColorRGB(*fill)
+            c.rect(self.MARGIN, self.y - 4, self.width, self.ROW_HEIGHT, stroke=0, fill=1)
+        c.setFillColorRGB(*color)
+        c.setFont(font, self.FONT_SIZE)
+        for i, value in enumerate(values):
+            text = self.clip(str(value), self.column_width - 4, font)
+            c.drawString(self.MARGIN + i * self.column_width + 2, self.y, text)
+        self.y -= self.ROW_HEIGHT
+
+    def clip(self, text, width, font):
+        text = " ".join(text.split())
+        # Coupe grossière d'abord : les descriptions peuvent être très longues
+        text = text[: int(width / (self.FONT_SIZE * 0.3))]
+        if stringWidth(text, font, self.FONT_SIZE) <= width:
+            return text
+        while text and stringWidth(text + "…", font, self.FONT_SIZE) > width:
+            text = text[:-1]
+        return text + "…"
+
+    def add_rows(self, rows):
+        for row in rows:
+            if self.y < self.MARGIN:
+                self.new_page()
+            stripe = self.STRIPE_COLOR if self.rows_on_page % 2 else None
+            self.draw_row(row, fill=stripe)
+            self.rows_on_page += 1
+
+    def close(self):
+        self.canvas.save()
@@ -0,0 +1,63 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+
+
+# ================================
+# 🔵 EXTRACTION DE TEXTE
+# ================================
+# Exécuté dans les processus du pool d'extraction (voir RECHERCHE dans
+# main.py) : fonctions pures, sans accès à la base ni à l'application.
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def extract_text(path, max_chars):
+    """Texte d'un PDF, d'un DOCX ou d'un fichier texte, tronqué à max_chars.
+
+    Renvoie "" pour les autres formats (images, tableurs...) et les fichiers
+    illisibles : le fichier reste téléchargeable, seulement pas cherchable.
+    PyPdfError couvre toutes les erreurs propres à pypdf ; ValueError les
+    valeurs mal formées (et UnicodeDecodeError) d'un PDF ou d'un texte abîmé.
+    """
+    with open(path, "rb") as f:
+        head = f.read(8)
+    try:
+        if head.startswith(b"%PDF"):
+            text = extract_pdf(path, max_chars)
+        elif head.startswith(b"PK"):
+            text = extract_docx(path)
+        else:
+            text = extract_plain(path, max_chars)
+    except (PyPdfError, zipfile.BadZipFile, KeyError, ElementTree.ParseError, ValueError):
+        return ""
+    # PostgreSQL refuse le caractère NUL dans un TEXT
+    return re.sub(r"[\x00\s]+", " ", text).strip()[:max_chars]
+
+
+def extract_pdf(path, max_chars):
+    parts, size = [], 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text)
+        if size >= max_chars:
+            break
+    return "\n".join(parts)
+
+
+def extract_docx(path):
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    return "\n".join(
+        "".join(node.text or "" for node in paragraph.iter(WORD_NS + "t"))
+        for paragraph in root.iter(WORD_NS + "p")
+    )
+
+
+def extract_plain(path, max_chars):
+    with open(path, encoding="utf-8") as f:
+        text = f.read(max_chars)
+    return "" if "\x00" in text else text
@@ -1,23 +1,304 @@
+import asyncio
+import base64
+import csv
+import hashlib
+import io
+import logging
+import re
+import json
+import multiprocessing
 import os
-from datetime import datetime
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import shutil
+import tempfile
+import time
+import unicodedata
+import uuid
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, get_args
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
 import aiofiles
-import psycopg
+import anyio
+from psycopg import AsyncCursor, AsyncServerCursor
 from psycopg.rows import dict_row
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from starlette.datastructures import Headers, UploadFile as StarletteUploadFile
 
+from exports import CsvTableWriter, PdfTableWriter, XlsxTableWriter
+from extraction import extract_text
+from metrics import SIZE_BUCKETS, MetricsRegistry
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+logger = logging.getLogger("qhse")
 
 # ================================
 # 🔵 CONFIGURATION BASE DE DONNÉES
 # ================================
-def get_db_connection():
-    conn = psycopg.connect(
-        os.environ.get("DATABASE_URL"),
-        autocommit=True,
-        row_factory=dict_row
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Taille du pool partagé par toutes les requêtes d'un worker uvicorn
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 20))
+# Délai max (secondes) pour obtenir une connexion avant de répondre 503
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+# Fermeture des connexions inactives au-delà de min_size (secondes)
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 300))
+# Nombre d'exécutions avant qu'une requête soit préparée côté serveur
+# (0 = dès la première). Vide pour désactiver, ex. derrière pgbouncer.
+DB_PREPARE_THRESHOLD = os.environ.get("DB_PREPARE_THRESHOLD", "0")
+
+
+def create_db_pool():
+    return AsyncConnectionPool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE,
+        kwargs={
+            "autocommit": True,
+            "row_factory": dict_row,
+            "cursor_factory": InstrumentedCursor,
+            "prepare_threshold": int(DB_PREPARE_THRESHOLD) if DB_PREPARE_THRESHOLD else None,
+        },
+        configure=configure_connection,
+        # Vérifie la connexion avant de la prêter (coupures réseau, redémarrage PG)
+        check=AsyncConnectionPool.check_connection,
+        open=False,
     )
-    return conn
+
+
+async def configure_connection(conn):
+    # Pas de paramètre de connexion pour les curseurs nommés (conn.cursor(name=...))
+    conn.server_cursor_factory = InstrumentedServerCursor
+
+
+def get_db_connection():
+    """Emprunte une connexion au pool : `async with get_db_connection() as conn:`."""
+    return app.state.db_pool.connection()
+
+
+# ================================
+# 🔵 INSTRUMENTATION
+# ================================
+# Exposé sur /metrics (format Prometheus) : latence, tailles et nombre de
+# requêtes HTTP par route, requêtes en cours, temps et lignes SQL, état du
+# pool. Les requêtes plus lentes que SLOW_REQUEST_SECONDS sont journalisées
+# avec leur temps base de données (vide pour désactiver).
+SLOW_REQUEST_SECONDS = os.environ.get("SLOW_REQUEST_SECONDS", "1")
+
+METRICS = MetricsRegistry()
+HTTP_REQUESTS = METRICS.counter(
+    "qhse_http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+)
+HTTP_DURATION = METRICS.histogram(
+    "qhse_http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route")
+)
+HTTP_DB_DURATION = METRICS.histogram(
+    "qhse_http_request_db_seconds", "Temps passé en base par requête HTTP", ("method", "route")
+)
+HTTP_REQUEST_SIZE = METRICS.histogram(
+    "qhse_http_request_size_bytes", "Taille du corps des requêtes", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = METRICS.histogram(
+    "qhse_http_response_size_bytes", "Taille du corps des réponses", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_IN_FLIGHT = METRICS.gauge("qhse_http_requests_in_flight", "Requêtes HTTP en cours")
+DB_DURATION = METRICS.histogram(
+    "qhse_db_query_duration_seconds", "Durée des requêtes SQL", ("operation",)
+)
+DB_ROWS = METRICS.counter("qhse_db_rows_total", "Lignes renvoyées ou modifiées par SQL", ("operation",))
+DB_POOL = METRICS.gauge("qhse_db_pool_connections", "Connexions du pool PostgreSQL", ("state",))
+EXTRACTION_QUEUE = METRICS.gauge("qhse_extraction_queue_size", "Fichiers en attente d'extraction de texte")
+
+# Temps base de données de la requête HTTP en cours (voir MetricsMiddleware)
+request_db_stats = ContextVar("request_db_stats", default=None)
+
+
+@METRICS.collector
+def collect_pool_stats():
+    pool = getattr(app.state, "db_pool", None)
+    if pool is not None:
+        stats = pool.get_stats()
+        DB_POOL.set(stats.get("pool_size", 0), state="ouvertes")
+        DB_POOL.set(stats.get("pool_available", 0), state="disponibles")
+        DB_POOL.set(stats.get("requests_waiting", 0), state="en_attente")
+        DB_POOL.set(pool.max_size, state="max")
+    queue = getattr(app.state, "extraction_queue", None)
+    if queue is not None:
+        EXTRACTION_QUEUE.set(queue.qsize())
+
+
+def query_operation(query):
+    """SELECT / INSERT / ... : premier mot-clé de la requête."""
+    if isinstance(query, bytes):
+        query = query[:64].decode("utf-8", "ignore")
+    if not isinstance(query, str):
+        return "AUTRE"
+    words = query.lstrip(" \t\n(").split(None, 1)
+    return words[0].upper() if words else "AUTRE"
+
+
+def record_query(query, elapsed, rowcount):
+    if query == "":
+        # execute("") de AsyncConnectionPool.check_connection, pas une requête de l'application
+        return
+    operation = query_operation(query)
+    rows = max(rowcount, 0)
+    DB_DURATION.observe(elapsed, operation=operation)
+    DB_ROWS.inc(rows, operation=operation)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats["seconds"] += elapsed
+        stats["queries"] += 1
+        stats["rows"] += rows
+
+
+class InstrumentedCursor(AsyncCursor):
+    """Curseur du pool : chaque execute / executemany / COPY est chronométré."""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(query, time.perf_counter() - start, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(query, time.perf_counter() - start, self.rowcount)
+
+    @asynccontextmanager
+    async def copy(self, statement, params=None, **kwargs):
+        # Durée du bloc `async with` : envoi des lignes compris
+        start = time.perf_counter()
+        try:
+            async with super().copy(statement, params, **kwargs) as copy:
+                yield copy
+        finally:
+            record_query(statement, time.perf_counter() - start, self.rowcount)
+
+
+class InstrumentedServerCursor(AsyncServerCursor):
+    """Curseur nommé : la déclaration et chaque lot lu sont des allers-retours
+    distincts ; leur temps et les lignes lues sont cumulés et comptés comme
+    une seule requête à la fermeture du curseur."""
+
+    _stats_query = None
+    _stats_elapsed = 0.0
+    _stats_rows = 0
+
+    def _record(self):
+        if self._stats_query is not None:
+            record_query(self._stats_query, self._stats_elapsed, self._stats_rows)
+        self._stats_query, self._stats_elapsed, self._stats_rows = None, 0.0, 0
+
+    async def _timed(self, operation):
+        start = time.perf_counter()
+        try:
+            return await operation
+        finally:
+            self._stats_elapsed += time.perf_counter() - start
+
+    async def execute(self, query, params=None, **kwargs):
+        self._record()
+        self._stats_query = query
+        return await self._timed(super().execute(query, params, **kwargs))
+
+    async def fetchone(self):
+        row = await self._timed(super().fetchone())
+        self._stats_rows += row is not None
+        return row
+
+    async def fetchmany(self, size=0):
+        rows = await self._timed(super().fetchmany(size))
+        self._stats_rows += len(rows)
+        return rows
+
+    async def fetchall(self):
+        rows = await self._timed(super().fetchall())
+        self._stats_rows += len(rows)
+        return rows
+
+    async def __aiter__(self):
+        # Comme AsyncServerCursor.__aiter__, lots de itersize, via fetchmany
+        while True:
+            rows = await self.fetchmany(self.itersize)
+            for row in rows:
+                yield row
+            if len(rows) < self.itersize:
+                break
+
+    async def close(self):
+        self._record()
+        await super().close()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI (pas BaseHTTPMiddleware : streaming et pathsend intacts)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        stats = {"seconds": 0.0, "queries": 0, "rows": 0}
+        token = request_db_stats.set(stats)
+        sizes = {"request": 0, "response": 0}
+        status = 500
+
+        async def receive_counted():
+            message = await receive()
+            sizes["request"] += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            elif message["type"] == "http.response.pathsend":
+                sizes["response"] += os.path.getsize(message["path"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            # Gabarit de la route (/api/{module}) plutôt que le chemin : cardinalité bornée
+            route = getattr(scope.get("route"), "path", "non_routee")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_DURATION.observe(elapsed, method=method, route=route)
+            HTTP_DB_DURATION.observe(stats["seconds"], method=method, route=route)
+            HTTP_REQUEST_SIZE.observe(sizes["request"], method=method, route=route)
+            HTTP_RESPONSE_SIZE.observe(sizes["response"], method=method, route=route)
+            if SLOW_REQUEST_SECONDS and elapsed >= float(SLOW_REQUEST_SECONDS):
+                logger.warning(
+                    "Requête lente : %s %s -> %s en %.3fs (SQL : %d requêtes, %.3fs, %d lignes)",
+                    method, scope["path"], status, elapsed,
+                    stats["queries"], stats["seconds"], stats["rows"],
+                )
 
 
 # ================================
@@ -30,19 +311,177 @@ class EPI(BaseModel):
     typeEPI: str
     marque: str
     taille: str
-    dateRemise: str
-    dateExpiration: str
+    dateRemise: date
+    dateExpiration: date
     statut: str
 
 
 class Formation(BaseModel):
     id: str
-    employe: str
+    nom: str
+    prenom: str
+    departement: str
+    fonction: str
+    typeFormation: str
+    intitule: str
+    centreFormation: str
+    dateFormation: date
+    dateExpiration: date
+
+
+class Materiel(BaseModel):
+    id: str
+    categorie: str
+    designation: str
+    numeroSerie: str
+    caracteristiques: str
+    dateControle: date
+    prochainControle: date
+    statut: str
+
+
+class Visite(BaseModel):
+    id: str
+    nom: str
+    prenom: str
+    departement: str
+    fonction: str
+    typeVisite: str
+    intitule: str
+    centreMedical: str
+    dateVisite: date
+    dateExpiration: date
+
+
+class PlanAction(BaseModel):
+    id: str
+    titre: str
+    description: str
+    responsable: str
+    departement: str
+    dateDebut: date
+    dateEcheance: date
+    priorite: str
+    avancement: int
+    statut: str
+    processus: str
+    mesureEfficacite: Optional[str] = None
+    commentaire: Optional[str] = None
+
+
+class Incident(BaseModel):
+    id: str
+    type: str
+    typeIncident: str
+    gravite: str
+    date: date
+    heure: str
+    lieu: str
+    description: str
+    personne: str
+    temoin: Optional[str] = None
+    action: Optional[str] = None
+    statut: str
+
+
+class PermisTravail(BaseModel):
+    id: str
+    numero: str
+    typeTravail: str
+    localisation: str
+    demandeur: str
+    executant: str
+    departement: str
+    descriptionTache: str
+    equipement: str
+    dateDebut: date
+    dateFin: date
+    heureDebut: str
+    heureFin: str
+    statut: str
+
+
+class DocumentGED(BaseModel):
+    id: str
+    titre: str
+    type: str
+    categorie: str
+    description: str
+    dateCreation: str
+    dateModification: str
+    auteur: str
+    statut: str
+    fichier: Optional[str] = None
+
+
+class PlanFormation(BaseModel):
+    id: str
     intitule: str
+    typeFormation: str
+    description: str
+    publicCible: str
+    formateur: str
+    dateDebut: date
+    dateFin: date
+    duree: str
+    lieu: str
+    cout: float
+    statut: str
+
+
+class ActiviteHSE(BaseModel):
+    id: str
+    titre: str
+    typeActivite: str
+    description: str
+    dateDebut: date
+    dateFin: date
+    heureDebut: str
+    heureFin: str
+    responsable: str
+    lieu: str
+    statut: str
+    priorite: str
+
+
+class VeilleReglementaire(BaseModel):
+    id: str
+    titre: str
+    reference: str
+    typeReglementation: str
     organisme: str
-    dateFormation: str
-    dateExpiration: str
+    datePublication: str
+    dateApplication: str
+    description: str
+    statut: str
+    impact: str
+
+
+class AspectEnvironnemental(BaseModel):
+    id: str
+    type: str
+    categorie: str
+    aspect: str
+    activite_source: str
+    localisation: str
+    description: str
+    condition_fonctionnement: str
+    impact_environnemental: str
+    criticite: str
     statut: str
+    indicateur: str
+    unite_mesure: str
+    methode_suivi: str
+    frequence_mesure: str
+    cible: str
+    objectif: str
+    donnees_mesurees: Optional[str] = None
+    date_derniere_mesure: str
+    responsable: str
+    mesures_maitrise: str
+    plan_actions: str
+    conformite_reglementaire: str
+    commentaires: Optional[str] = None
 
 
 class Rapport(BaseModel):
@@ -53,77 +492,970 @@ class Rapport(BaseModel):
     date: str
 
 
+# ================================
+# 🔵 REGISTRE DES MODULES
+# ================================
+# Clé = segment d'URL utilisé par le frontend (/api/<module>).
+#   table      : table PostgreSQL
+#   model      : modèle Pydantic (colonnes de la table)
+#   compteurs  : champs dont la répartition est comptée pour le dashboard
+#   echeance   : date d'expiration / de contrôle suivie pour les alertes
+#   actifs     : statuts pour lesquels l'échéance compte (tous si absent)
+#   periode    : date dont le mois est compté (ex. incidents du mois)
+#   recherche  : (champs titre, champs texte) indexés pour /api/search
+MODULES = {
+    "formations": {
+        "table": "formations",
+        "model": Formation,
+        "compteurs": [],
+        "echeance": "dateExpiration",
+    },
+    "materiel": {
+        "table": "materiel",
+        "model": Materiel,
+        "compteurs": ["statut"],
+        "echeance": "prochainControle",
+    },
+    "visites": {
+        "table": "visites",
+        "model": Visite,
+        "compteurs": [],
+        "echeance": "dateExpiration",
+    },
+    "plans": {
+        "table": "plans",
+        "model": PlanAction,
+        "compteurs": ["statut"],
+        "echeance": "dateEcheance",
+        "actifs": {"en_cours"},
+    },
+    "epi": {
+        "table": "epi",
+        "model": EPI,
+        "compteurs": ["statut"],
+        "echeance": "dateExpiration",
+    },
+    "incidents": {
+        "table": "incidents",
+        "model": Incident,
+        "compteurs": ["statut", "gravite", "type"],
+        "periode": "date",
+    },
+    "permis": {
+        "table": "permis",
+        "model": PermisTravail,
+        "compteurs": ["statut"],
+        "echeance": "dateFin",
+        "actifs": {"approuve", "en_cours"},
+    },
+    "ged": {
+        "table": "ged",
+        "model": DocumentGED,
+        "compteurs": ["statut"],
+        "recherche": (["titre"], ["description", "categorie", "type", "auteur"]),
+    },
+    "planformations": {
+        "table": "plan_formations",
+        "model": PlanFormation,
+        "compteurs": ["statut"],
+    },
+    "planninghse": {
+        "table": "planning_hse",
+        "model": ActiviteHSE,
+        "compteurs": ["statut"],
+        "periode": "dateDebut",
+    },
+    "veillereglementaire": {
+        "table": "veille_reglementaire",
+        "model": VeilleReglementaire,
+        "compteurs": ["statut"],
+        "recherche": (["titre", "reference"], ["description", "organisme", "typeReglementation"]),
+    },
+    "aspects-environnementaux": {
+        "table": "aspects_environnementaux",
+        "model": AspectEnvironnemental,
+        "compteurs": ["statut", "type", "conformite_reglementaire"],
+    },
+    "rapport": {
+        "table": "rapport",
+        "model": Rapport,
+        "compteurs": [],
+        "recherche": (["titre"], ["contenu", "auteur"]),
+    },
+}
+
+
+def get_module(module: str):
+    if module not in MODULES:
+        raise HTTPException(status_code=404, detail=f"Module inconnu : {module}")
+    return MODULES[module]
+
+
+def normalize(value):
+    """'En cours' / 'en_cours' / 'Approuvé' -> 'en_cours' / 'approuve'."""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value).strip().lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.replace(" ", "_").replace("-", "_")
+
+
+def date_key(value):
+    """Date ISO 'YYYY-MM-DD' d'une valeur date/str, ou None si illisible."""
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return date.fromisoformat(str(value)[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+# ================================
+# 🔵 SCHÉMA
+# ================================
+SQL_TYPES = {str: "TEXT", int: "INTEGER", float: "DOUBLE PRECISION", date: "DATE"}
+
+
+def sql_type(field):
+    return next(
+        sql for py, sql in SQL_TYPES.items()
+        if field.annotation is py or py in get_args(field.annotation)
+    )
+
+
+def table_ddl(table, model):
+    columns = []
+    for name, field in model.model_fields.items():
+        column_type = sql_type(field)
+        if name == "id":
+            columns.append(f"{name} {column_type} PRIMARY KEY")
+        elif field.is_required():
+            columns.append(f"{name} {column_type} NOT NULL")
+        else:
+            columns.append(f"{name} {column_type}")
+    return f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})"
+
+
+def search_text(fields):
+    return " || ' ' || ".join(f"coalesce({f}, '')" for f in fields)
+
+
+def search_vector_ddl(recherche):
+    """tsvector généré (stemming français) : titres en poids A, texte en poids B.
+    Tenu à jour par PostgreSQL à chaque INSERT / UPDATE, quelle que soit la route."""
+    titres, textes = recherche
+    return (
+        "tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('french', {search_text(titres)}), 'A') || "
+        f"setweight(to_tsvector('french', {search_text(textes)}), 'B')"
+        ") STORED"
+    )
+
+
+# Colonnes réellement NULL-ables par table (schéma hérité, dates illisibles
+# passées à NULL par migrate_date_columns), relevées par init_db : la
+# pagination par clé doit y traiter NULL explicitement.
+NULLABLE_COLUMNS = {}
+
+
+async def load_nullable_columns(conn):
+    cur = await conn.execute(
+        "SELECT table_name, column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND is_nullable = 'YES'"
+    )
+    nullable = {(row["table_name"], row["column_name"]) for row in await cur.fetchall()}
+    for config in MODULES.values():
+        table = config["table"]
+        NULLABLE_COLUMNS[table] = {
+            name for name in config["model"].model_fields if (table, name.lower()) in nullable
+        }
+
+
+async def migrate_date_columns(conn, table, model):
+    """Convertit en DATE les colonnes encore en TEXT (saisies 'YYYY-MM-DD' ou
+    'DD/MM/YYYY'). Les valeurs illisibles passent à NULL et sont conservées
+    dans date_migration_rejects."""
+    for name, field in model.model_fields.items():
+        if sql_type(field) != "DATE":
+            continue
+        cur = await conn.execute(
+            """
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+            """,
+            (table, name.lower()),
+        )
+        column = await cur.fetchone()
+        if not column or column["data_type"] == "date":
+            continue
+        async with conn.transaction():
+            await conn.execute(
+                f"""
+                INSERT INTO date_migration_rejects (table_name, id, column_name, value)
+                SELECT %s, id, %s, {name} FROM {table} WHERE qhse_to_date({name}) IS NULL
+                """,
+                (table, name),
+            )
+            await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {name} DROP NOT NULL")
+            await conn.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {name} TYPE DATE USING qhse_to_date({name})"
+            )
+            cur = await conn.execute(f"SELECT 1 FROM {table} WHERE {name} IS NULL LIMIT 1")
+            if field.is_required() and not await cur.fetchone():
+                await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {name} SET NOT NULL")
+
+
+async def init_db(conn):
+    await conn.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION qhse_to_date(value TEXT) RETURNS DATE AS $$
+        BEGIN
+            IF value ~ '^\d{2}/\d{2}/\d{4}$' THEN
+                RETURN to_date(value, 'DD/MM/YYYY');
+            END IF;
+            RETURN substr(value, 1, 10)::date;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS date_migration_rejects (
+            table_name TEXT NOT NULL,
+            id TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            value TEXT,
+            migrated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    for config in MODULES.values():
+        table = config["table"]
+        await conn.execute(table_ddl(table, config["model"]))
+        await migrate_date_columns(conn, table, config["model"])
+        # Index des échéances et périodes : alertes et expirations en range scan
+        for field in (config.get("echeance"), config.get("periode")):
+            if field:
+                await conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{field.lower()}_idx ON {table} ({field}, id)"
+                )
+        # Version de ligne pour la synchronisation incrémentale (voir SYNCHRONISATION)
+        await conn.execute(
+            f"ALTER TABLE {table} "
+            f"ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT {ROW_VERSION}, "
+            f"ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+        )
+        await conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_row_version_idx ON {table} (row_version)")
+        if config.get("recherche"):
+            await conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector {search_vector_ddl(config['recherche'])}"
+            )
+            await conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector)"
+            )
+    await load_nullable_columns(conn)
+    await conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS deleted_rows (
+            module TEXT NOT NULL,
+            id TEXT NOT NULL,
+            row_version BIGINT NOT NULL DEFAULT {ROW_VERSION},
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (module, id)
+        )
+        """
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS deleted_rows_version_idx ON deleted_rows (module, row_version)"
+    )
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size BIGINT NOT NULL,
+            ref_count INTEGER NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            content_type TEXT,
+            sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+            module TEXT,
+            ref_id TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute("CREATE INDEX IF NOT EXISTS documents_filename_idx ON documents (filename)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS documents_ref_idx ON documents (module, ref_id)")
+    # Texte extrait d'un blob (une fois par contenu), supprimé avec lui
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_texts (
+            sha256 TEXT PRIMARY KEY REFERENCES blobs (sha256) ON DELETE CASCADE,
+            content TEXT NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS (to_tsvector('french', content)) STORED,
+            extracted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS document_texts_search_idx ON document_texts USING GIN (search_vector)"
+    )
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            module TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            value BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (module, dimension, bucket)
+        )
+        """
+    )
+
+
+# ================================
+# 🔵 SYNCHRONISATION
+# ================================
+# row_version = identifiant de la transaction qui a écrit la ligne. Un client
+# synchronisé à la version V (xmin du snapshot de sa dernière lecture) reçoit
+# les lignes et suppressions de version >= V : une transaction encore en
+# cours lors de sa lecture a forcément un identifiant >= V, donc aucune
+# écriture n'est perdue, au prix de quelques lignes renvoyées deux fois.
+#
+# Les ETags de module ne peuvent pas reposer sur max(row_version) : les
+# identifiants de transaction ne suivent pas l'ordre des commits, une
+# transaction validée après une autre d'id plus grand ne change pas ce max.
+# Ils viennent du compteur ("revision", "") de dashboard_counters,
+# incrémenté par chaque écriture dans sa propre transaction (voir
+# update_counters_many).
+ROW_VERSION = "(pg_current_xact_id()::text::bigint)"
+SNAPSHOT_VERSION = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS version"
+
+
+def select_columns(module):
+    """Colonnes du module avec leur casse d'origine (typeEPI et non typeepi)."""
+    return ", ".join(f'{name} AS "{name}"' for name in MODULES[module]["model"].model_fields)
+
+
+async def record_deletion(conn, module, row_id):
+    await conn.execute(
+        f"""
+        INSERT INTO deleted_rows (module, id) VALUES (%s, %s)
+        ON CONFLICT (module, id)
+        DO UPDATE SET row_version = {ROW_VERSION}, deleted_at = now()
+        """,
+        (module, row_id),
+    )
+
+
+async def module_etags(conn, modules):
+    """ETag par module : change à chaque création, modification ou suppression."""
+    cur = await conn.execute(
+        """
+        SELECT module, value FROM dashboard_counters
+        WHERE dimension = 'revision' AND bucket = '' AND module = ANY(%s)
+        """,
+        (list(modules),),
+    )
+    revisions = {row["module"]: row["value"] for row in await cur.fetchall()}
+    return {module: f'"{module}-{revisions.get(module, 0)}"' for module in modules}
+
+
+def parse_if_none_match(header):
+    return {tag.strip().removeprefix("W/") for tag in (header or "").split(",") if tag.strip()}
+
+
+# ================================
+# 🔵 COMPTEURS DASHBOARD
+# ================================
+# Une ligne de dashboard_counters par (module, dimension, bucket) :
+#   ("epi", "total", "")                 nombre de lignes
+#   ("epi", "statut", "en_service")      répartition d'un champ de `compteurs`
+#   ("epi", "echeance", "2026-11-30")    lignes expirant ce jour-là
+#   ("incidents", "periode", "2026-10")  lignes datées de ce mois
+#   ("epi", "revision", "")              nombre d'écritures (ETags, voir SYNCHRONISATION)
+# Les compteurs sont mis à jour dans la même transaction que l'écriture ;
+# les KPIs « expire sous 30 jours » deviennent une somme sur ~30 buckets.
+def counter_keys(module, row):
+    config = MODULES[module]
+    row = {k.lower(): v for k, v in row.items()}
+    keys = [("total", "")]
+    for field in config["compteurs"]:
+        keys.append((field, normalize(row.get(field.lower()))))
+    echeance = config.get("echeance")
+    if echeance and ("actifs" not in config or normalize(row.get("statut")) in config["actifs"]):
+        day = date_key(row.get(echeance.lower()))
+        if day:
+            keys.append(("echeance", day))
+    periode = config.get("periode")
+    if periode:
+        day = date_key(row.get(periode.lower()))
+        if day:
+            keys.append(("periode", day[:7]))
+    return keys
+
+
+async def update_counters(conn, module, old=None, new=None):
+    """Applique le delta (-old, +new) aux compteurs de `module`."""
+    await update_counters_many(conn, module, [old] if old else [], [new] if new else [])
+
+
+def counter_deltas(module, removed, added):
+    """{(dimension, bucket): delta} non nuls pour ces lignes retirées/ajoutées."""
+    deltas = Counter()
+    for row in removed:
+        deltas.subtract(counter_keys(module, row))
+    for row in added:
+        deltas.update(counter_keys(module, row))
+    return {key: n for key, n in deltas.items() if n}
+
+
+async def update_counters_many(conn, module, removed, added):
+    if not removed and not added:
+        return
+    deltas = counter_deltas(module, removed, added)
+    # Toute écriture change la révision, même sans effet sur les autres compteurs
+    deltas[("revision", "")] = 1
+    # Verrous de lignes toujours pris dans le même ordre : deux écritures
+    # concurrentes de sens opposé (statut A -> B et B -> A) ne s'interbloquent pas
+    params = [(module, dim, bucket, n) for (dim, bucket), n in sorted(deltas.items())]
+    async with conn.cursor() as cur:
+        await cur.executemany(
+            """
+            INSERT INTO dashboard_counters (module, dimension, bucket, value)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (module, dimension, bucket)
+            DO UPDATE SET value = dashboard_counters.value + EXCLUDED.value
+            """,
+            params,
+        )
+
+
+def counter_columns(module):
+    config = MODULES[module]
+    fields = ["statut", *config["compteurs"], config.get("echeance"), config.get("periode")]
+    fields = [f for f in dict.fromkeys(fields) if f and f in config["model"].model_fields]
+    return ", ".join(fields) or "id"
+
+
+async def rebuild_counters(conn):
+    """Recalcule tous les compteurs (démarrage, écritures faites hors API).
+
+    Les révisions sont gardées et incrémentées : des écritures faites hors
+    API invalident ainsi les ETags déjà distribués.
+    """
+    async with conn.transaction():
+        await conn.execute("LOCK TABLE dashboard_counters IN EXCLUSIVE MODE")
+        await conn.execute("DELETE FROM dashboard_counters WHERE dimension <> 'revision'")
+        await conn.execute("UPDATE dashboard_counters SET value = value + 1")
+        for module, config in MODULES.items():
+            totals = Counter()
+            async with conn.cursor(name=f"counters_{config['table']}") as cur:
+                await cur.execute(f"SELECT {counter_columns(module)} FROM {config['table']}")
+                async for row in cur:
+                    totals.update(counter_keys(module, row))
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    "INSERT INTO dashboard_counters (module, dimension, bucket, value) VALUES (%s, %s, %s, %s)",
+                    [(module, dim, bucket, n) for (dim, bucket), n in sorted(totals.items())],
+                )
+
+
+# ================================
+# 🔵 STOCKAGE DES FICHIERS
+# ================================
+# Stockage adressé par contenu : uploads/blobs/ab/abcdef... (SHA-256).
+# Un même fichier déposé plusieurs fois n'est écrit qu'une fois ; la table
+# documents relie chaque dépôt (nom, module, enregistrement) à son blob et
+# blobs.ref_count compte les documents qui le référencent.
+UPLOAD_DIR = "uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+TMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 100 * 1024 * 1024))
+FILE_ROUTES = ("/api/files/", "/uploads/")
+UPLOAD_ROUTES = ("/api/upload", "/api/ged/upload")
+
+
+def blob_path(sha256):
+    return os.path.join(BLOB_DIR, sha256[:2], sha256)
+
+
+async def store_blob(conn, tmp_path, sha256, size):
+    """Rattache un fichier temporaire haché à son blob (créé ou réutilisé).
+
+    À appeler dans une transaction : le verrou consultatif par empreinte
+    sérialise dépôts et suppressions du même contenu.
+    """
+    await conn.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (sha256,))
+    await conn.execute(
+        """
+        INSERT INTO blobs (sha256, size, ref_count) VALUES (%s, %s, 1)
+        ON CONFLICT (sha256) DO UPDATE SET ref_count = blobs.ref_count + 1
+        """,
+        (sha256, size),
+    )
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return path
+
+
+async def create_document(conn, filename, content_type, sha256, module=None, ref_id=None):
+    document_id = uuid.uuid4().hex
+    await conn.execute(
+        """
+        INSERT INTO documents (id, filename, content_type, sha256, module, ref_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        (document_id, filename, content_type, sha256, module, ref_id),
+    )
+    return document_id
+
+
+async def release_documents(conn, where, params):
+    """Supprime des documents et les blobs qui ne sont plus référencés.
+
+    Renvoie les empreintes des blobs supprimés : leurs fichiers sont effacés
+    par remove_blob_files, une fois la transaction validée.
+    """
+    orphans = []
+    cur = await conn.execute(f"DELETE FROM documents WHERE {where} RETURNING sha256", params)
+    for row in await cur.fetchall():
+        sha256 = row["sha256"]
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (sha256,))
+        cur = await conn.execute(
+            "UPDATE blobs SET ref_count = ref_count - 1 WHERE sha256 = %s RETURNING ref_count",
+            (sha256,),
+        )
+        blob = await cur.fetchone()
+        if blob and blob["ref_count"] <= 0:
+            await conn.execute("DELETE FROM blobs WHERE sha256 = %s", (sha256,))
+            orphans.append(sha256)
+    return orphans
+
+
+async def remove_blob_files(conn, hashes):
+    """Efface les fichiers de blobs supprimés (hors de la transaction qui les a
+    libérés : un rollback ne laisse pas de document sans fichier).
+
+    Sous le verrou de l'empreinte, le fichier est gardé si un dépôt du même
+    contenu a recréé le blob entre-temps.
+    """
+    for sha256 in hashes:
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (sha256,))
+            cur = await conn.execute("SELECT 1 FROM blobs WHERE sha256 = %s", (sha256,))
+            if await cur.fetchone() is None and os.path.exists(blob_path(sha256)):
+                os.remove(blob_path(sha256))
+
+
+async def import_legacy_uploads(conn):
+    """Range dans le stockage par contenu les fichiers déposés à plat dans uploads/.
+
+    Les originaux restent en place (certains sont suivis par git) : le blob en
+    est une copie, et un fichier déjà importé (même nom, même contenu) est
+    ignoré aux démarrages suivants. Avec plusieurs workers, chaque import se
+    fait sous le verrou de l'empreinte et un fichier disparu est ignoré.
+    """
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    for entry in os.scandir(UPLOAD_DIR):
+        if not entry.is_file():
+            continue
+        digest = hashlib.sha256()
+        try:
+            async with aiofiles.open(entry.path, "rb") as f:
+                while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            continue
+        sha256 = digest.hexdigest()
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (sha256,))
+            cur = await conn.execute(
+                "SELECT 1 FROM documents WHERE filename = %s AND sha256 = %s", (entry.name, sha256)
+            )
+            if await cur.fetchone():
+                continue
+            os.makedirs(TMP_DIR, exist_ok=True)
+            tmp_path = os.path.join(TMP_DIR, uuid.uuid4().hex)
+            try:
+                await anyio.to_thread.run_sync(shutil.copyfile, entry.path, tmp_path)
+            except FileNotFoundError:
+                continue
+            await store_blob(conn, tmp_path, sha256, os.path.getsize(tmp_path))
+            await create_document(conn, entry.name, None, sha256)
+
+
+class BlobResponse(FileResponse):
+    """FileResponse (Range compris) qui laisse le serveur ASGI envoyer le
+    fichier lui-même, sans copie (sendfile), s'il annonce l'extension
+    http.response.pathsend. Sinon : lecture par blocs classique."""
+
+    async def __call__(self, scope, receive, send):
+        pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        if not pathsend or scope["method"] == "HEAD" or "range" in Headers(scope=scope):
+            return await super().__call__(scope, receive, send)
+        if self.stat_result is None:
+            # Content-Length / Last-Modified, posés par FileResponse après os.stat
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            self.set_stat_headers(self.stat_result)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+        if self.background is not None:
+            await self.background()
+
+
+class UploadLimitMiddleware:
+    """MAX_UPLOAD_SIZE appliqué pendant la réception du corps des dépôts.
+
+    FastAPI lit tout le formulaire multipart (File(...)) avant d'appeler la
+    route, qui ne peut donc pas borner la réception elle-même. Un
+    Content-Length trop grand est refusé d'emblée ; sans Content-Length
+    (chunked), la lecture s'arrête dès que le corps dépasse la limite.
+    """
+
+    def __init__(self, app, max_size=MAX_UPLOAD_SIZE):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in UPLOAD_ROUTES:
+            return await self.app(scope, receive, send)
+        try:
+            declared = int(Headers(scope=scope).get("content-length") or 0)
+        except ValueError:
+            response = JSONResponse({"detail": "Content-Length invalide"}, status_code=400)
+            return await response(scope, receive, send)
+        if declared > self.max_size:
+            response = JSONResponse({"detail": "Fichier trop volumineux"}, status_code=413)
+            return await response(scope, receive, send)
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.max_size:
+                # Relevée telle quelle par FastAPI pendant l'analyse du formulaire
+                raise HTTPException(status_code=413, detail="Fichier trop volumineux")
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+class FileAwareGZipMiddleware(GZipMiddleware):
+    """GZip sauf pour les fichiers : souvent déjà compressés, et la compression
+    casserait les réponses partielles (Range) et l'envoi sans copie."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(FILE_ROUTES):
+            return await self.app(scope, receive, send)
+        return await super().__call__(scope, receive, send)
+
+
+# ================================
+# 🔵 ÉCHÉANCES
+# ================================
+# Une tâche de fond recalcule périodiquement les échéances dépassées et à venir
+# de chaque module (requêtes par plage sur les colonnes DATE indexées), et plus
+# tôt quand une écriture touche un module à échéance. /api/expirations lit ce
+# cache ; au-delà de l'horizon calculé, la requête est faite à la demande.
+# Période de recalcul (secondes) et horizon (jours) gardé en cache
+EXPIRY_REFRESH_SECONDS = float(os.environ.get("EXPIRY_REFRESH_SECONDS", 300))
+EXPIRY_HORIZON_DAYS = int(os.environ.get("EXPIRY_HORIZON_DAYS", 90))
+
+
+async def fetch_expirations(conn, within_days, today=None):
+    """Lignes agrégées (departement, echeance, n) par module, échéance <= horizon."""
+    today = today or date.today()
+    horizon = today + timedelta(days=within_days)
+    modules = {}
+    for module, config in MODULES.items():
+        champ = config.get("echeance")
+        if not champ:
+            continue
+        model_fields = config["model"].model_fields
+        departement = "departement" if "departement" in model_fields else "NULL"
+        statut = "statut" if "statut" in model_fields else "NULL"
+        cur = await conn.execute(
+            f"SELECT {departement} AS departement, {statut} AS statut, {champ} AS echeance, count(*) AS n "
+            f"FROM {config['table']} WHERE {champ} <= %s GROUP BY 1, 2, 3",
+            (horizon,),
+        )
+        modules[module] = [
+            (row["departement"] or "", row["echeance"], row["n"])
+            for row in await cur.fetchall()
+            if "actifs" not in config or normalize(row["statut"]) in config["actifs"]
+        ]
+    return {"today": today, "horizon": within_days, "calculeLe": datetime.now().isoformat(), "modules": modules}
+
+
+def summarize_expirations(snapshot, within_days):
+    today = snapshot["today"]
+    horizon = today + timedelta(days=within_days)
+    result = {}
+    for module, rows in snapshot["modules"].items():
+        totals = {"enRetard": 0, "aEcheance": 0}
+        departements = {}
+        for departement, echeance, n in rows:
+            if echeance > horizon:
+                continue
+            key = "enRetard" if echeance < today else "aEcheance"
+            totals[key] += n
+            par_departement = departements.setdefault(departement, {"enRetard": 0, "aEcheance": 0})
+            par_departement[key] += n
+        result[module] = {**totals, "departements": departements}
+    return result
+
+
+def notify_expirations(module):
+    """Réveille le calcul des échéances après une écriture sur `module`."""
+    if MODULES[module].get("echeance"):
+        app.state.expirations_changed.set()
+
+
+async def expiry_scheduler(app):
+    changed = app.state.expirations_changed
+    while True:
+        changed.clear()
+        try:
+            async with get_db_connection() as conn:
+                app.state.expirations = await fetch_expirations(conn, EXPIRY_HORIZON_DAYS)
+        except Exception:
+            logger.exception("Calcul des échéances impossible")
+        try:
+            await asyncio.wait_for(changed.wait(), EXPIRY_REFRESH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ================================
+# 🔵 RECHERCHE PLEIN TEXTE
+# ================================
+# Index inversés PostgreSQL (tsvector + GIN, configuration 'french') :
+# colonnes générées sur les modules déclarant `recherche`, et document_texts
+# pour le contenu des fichiers déposés. L'extraction du texte (PDF, DOCX,
+# texte) tourne dans un pool de processus alimenté par une file : à chaque
+# dépôt, et au démarrage pour les blobs pas encore indexés.
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", 2))
+# Texte gardé par fichier (caractères) : borne la taille des tsvector et le
+# coût des extraits surlignés
+SEARCH_MAX_CHARS = int(os.environ.get("SEARCH_MAX_CHARS", 200_000))
+SEARCH_MAX_LIMIT = 100
+SEARCH_HEADLINE = 'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=" … "'
+SEARCH_FILES = "fichiers"
+
+
+def queue_text_extraction(sha256):
+    app.state.extraction_queue.put_nowait(sha256)
+
+
+async def queue_pending_extractions(conn):
+    cur = await conn.execute(
+        "SELECT sha256 FROM blobs b WHERE NOT EXISTS (SELECT 1 FROM document_texts t WHERE t.sha256 = b.sha256)"
+    )
+    for row in await cur.fetchall():
+        queue_text_extraction(row["sha256"])
+
+
+async def text_extraction_worker(app):
+    loop = asyncio.get_running_loop()
+    queue = app.state.extraction_queue
+    while True:
+        sha256 = await queue.get()
+        try:
+            async with get_db_connection() as conn:
+                cur = await conn.execute("SELECT 1 FROM document_texts WHERE sha256 = %s", (sha256,))
+                if await cur.fetchone():
+                    continue
+            path = os.path.abspath(blob_path(sha256))
+            if not os.path.exists(path):
+                continue
+            try:
+                content = await loop.run_in_executor(
+                    app.state.extraction_pool, extract_text, path, SEARCH_MAX_CHARS
+                )
+            except Exception:
+                # Texte vide enregistré : sinon queue_pending_extractions
+                # relancerait le même fichier à chaque démarrage
+                logger.exception("Extraction du texte impossible : %s", sha256)
+                content = ""
+            async with get_db_connection() as conn:
+                # Le blob a pu être supprimé pendant l'extraction
+                await conn.execute(
+                    """
+                    INSERT INTO document_texts (sha256, content)
+                    SELECT sha256, %s FROM blobs WHERE sha256 = %s
+                    ON CONFLICT (sha256) DO NOTHING
+                    """,
+                    (content, sha256),
+                )
+        except Exception:
+            logger.exception("Enregistrement du texte impossible : %s", sha256)
+        finally:
+            queue.task_done()
+
+
+def search_module_query(module):
+    config = MODULES[module]
+    titres, textes = config["recherche"]
+    return f"""
+        (SELECT %(module_{module})s AS module, id, {titres[0]} AS titre, rank,
+                ts_headline('french', {search_text(textes)}, query, %(options)s) AS extrait,
+                NULL AS source, NULL AS ref_id
+         FROM (SELECT *, ts_rank_cd(search_vector, query, 32) AS rank
+               FROM {config['table']}, websearch_to_tsquery('french', %(q)s) AS query
+               WHERE search_vector @@ query
+               ORDER BY rank DESC LIMIT %(limit)s) hits)
+    """
+
+
+SEARCH_FILES_QUERY = """
+    (SELECT %(module_fichiers)s AS module, d.id, d.filename AS titre, hits.rank,
+            ts_headline('french', hits.content, hits.query, %(options)s) AS extrait,
+            d.module AS source, d.ref_id
+     FROM (SELECT t.sha256, t.content, query, ts_rank_cd(t.search_vector, query, 1|32) AS rank
+           FROM document_texts t, websearch_to_tsquery('french', %(q)s) AS query
+           WHERE t.search_vector @@ query
+           ORDER BY rank DESC LIMIT %(limit)s) hits
+     JOIN documents d ON d.sha256 = hits.sha256)
+"""
+
+
 # ================================
 # 🔵 APP FastAPI
 # ================================
-app = FastAPI()
+async def cancel_tasks(tasks):
+    # Sous Python 3.11, une annulation reçue pendant une attente psycopg peut
+    # être perdue (course dans asyncio.wait_for) : on annule jusqu'à l'arrêt.
+    pending = set(tasks)
+    while pending:
+        for task in pending:
+            task.cancel()
+        _, pending = await asyncio.wait(pending, timeout=1)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.db_pool = create_db_pool()
+    await app.state.db_pool.open()
+    app.state.expirations = None
+    app.state.expirations_changed = asyncio.Event()
+    app.state.extraction_queue = asyncio.Queue()
+    # spawn : pas de fork d'un processus qui a déjà des threads et des sockets
+    app.state.extraction_pool = ProcessPoolExecutor(
+        SEARCH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+    async with get_db_connection() as conn:
+        await init_db(conn)
+        await rebuild_counters(conn)
+        await import_legacy_uploads(conn)
+        await queue_pending_extractions(conn)
+    tasks = [asyncio.create_task(expiry_scheduler(app))]
+    tasks += [asyncio.create_task(text_extraction_worker(app)) for _ in range(SEARCH_WORKERS)]
+    try:
+        yield
+    finally:
+        await cancel_tasks(tasks)
+        app.state.extraction_pool.shutdown(wait=False, cancel_futures=True)
+        await app.state.db_pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+app.add_middleware(FileAwareGZipMiddleware, minimum_size=1024)
+app.add_middleware(UploadLimitMiddleware)
+# Ajouté en dernier = le plus externe : durées et tailles telles qu'envoyées
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Base de données saturée, réessayez dans un instant"},
+    )
 
 
 # ================================
 # 🔵 ROUTES EPI
 # ================================
-@app.get("/api/epi")
-def get_all_epi():
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM epi")
-    data = cur.fetchall()
-    conn.close()
-    return data
-
-
 @app.post("/api/epi")
-def create_epi(epi: EPI):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO epi (id, employe, departement, typeEPI, marque, taille, dateRemise, dateExpiration, statut)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """,
-        (
-            epi.id, epi.employe, epi.departement, epi.typeEPI,
-            epi.marque, epi.taille, epi.dateRemise, epi.dateExpiration, epi.statut
+async def create_epi(epi: EPI):
+    async with get_db_connection() as conn, conn.transaction():
+        await conn.execute(
+            """
+            INSERT INTO epi (id, employe, departement, typeEPI, marque, taille, dateRemise, dateExpiration, statut)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (
+                epi.id, epi.employe, epi.departement, epi.typeEPI,
+                epi.marque, epi.taille, epi.dateRemise, epi.dateExpiration, epi.statut
+            )
         )
-    )
-    conn.close()
+        await update_counters(conn, "epi", new=epi.model_dump())
+    notify_expirations("epi")
     return epi
 
 
 @app.put("/api/epi/{epi_id}")
-def update_epi(epi_id: str, epi: EPI):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE epi SET
-            employe=%s, departement=%s, typeEPI=%s, marque=%s, taille=%s,
-            dateRemise=%s, dateExpiration=%s, statut=%s
-        WHERE id=%s
-        """,
-        (
-            epi.employe, epi.departement, epi.typeEPI, epi.marque,
-            epi.taille, epi.dateRemise, epi.dateExpiration, epi.statut,
-            epi_id
+async def update_epi(epi_id: str, epi: EPI):
+    async with get_db_connection() as conn, conn.transaction():
+        cur = await conn.execute("SELECT * FROM epi WHERE id = %s FOR UPDATE", (epi_id,))
+        old = await cur.fetchone()
+        await conn.execute(
+            """
+            UPDATE epi SET
+                employe=%s, departement=%s, typeEPI=%s, marque=%s, taille=%s,
+                dateRemise=%s, dateExpiration=%s, statut=%s,
+                row_version=DEFAULT, updated_at=DEFAULT
+            WHERE id=%s
+            """,
+            (
+                epi.employe, epi.departement, epi.typeEPI, epi.marque,
+                epi.taille, epi.dateRemise, epi.dateExpiration, epi.statut,
+                epi_id
+            )
         )
-    )
-    conn.close()
+        if old:
+            await update_counters(conn, "epi", old=old, new=epi.model_dump())
+    notify_expirations("epi")
     return {"message": "ÉPI mis à jour"}
 
 
 @app.delete("/api/epi/{epi_id}")
-def delete_epi(epi_id: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM epi WHERE id = %s", (epi_id,))
-    conn.close()
+async def delete_epi(epi_id: str):
+    async with get_db_connection() as conn, conn.transaction():
+        cur = await conn.execute("DELETE FROM epi WHERE id = %s RETURNING *", (epi_id,))
+        old = await cur.fetchone()
+        if old:
+            await update_counters(conn, "epi", old=old)
+            await record_deletion(conn, "epi", epi_id)
+    notify_expirations("epi")
     return {"message": "ÉPI supprimé"}
 
 
@@ -131,28 +1463,1129 @@ def delete_epi(epi_id: str):
 # 🔵 ROUTES RAPPORTS / UPLOADS
 # ================================
 @app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...)):
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
+async def upload_file(
+    file: UploadFile = File(...),
+    module: Optional[str] = Form(None),
+    ref_id: Optional[str] = Form(None),
+):
+    """Dépôt par blocs : mémoire constante, SHA-256 calculé au fil de l'eau.
+    La taille du corps est bornée à la réception par UploadLimitMiddleware."""
+    os.makedirs(TMP_DIR, exist_ok=True)
+    tmp_path = os.path.join(TMP_DIR, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail="Fichier trop volumineux")
+                digest.update(chunk)
+                await f.write(chunk)
+
+        sha256 = digest.hexdigest()
+        async with get_db_connection() as conn, conn.transaction():
+            path = await store_blob(conn, tmp_path, sha256, size)
+            document_id = await create_document(
+                conn, file.filename, file.content_type, sha256, module, ref_id
+            )
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    queue_text_extraction(sha256)
+
+    return {
+        "id": document_id,
+        "filename": file.filename,
+        "path": path,
+        "sha256": sha256,
+        "size": size,
+        "url": f"/api/files/{document_id}",
+    }
+
+
+@app.post("/api/ged/upload")
+async def upload_ged_file(file: UploadFile = File(...), ref_id: Optional[str] = Form(None)):
+    return await upload_file(file, "ged", ref_id)
+
+
+async def send_document(where, params):
+    async with get_db_connection() as conn:
+        cur = await conn.execute(
+            f"SELECT filename, content_type, sha256 FROM documents WHERE {where} "
+            "ORDER BY created_at DESC LIMIT 1",
+            params,
+        )
+        document = await cur.fetchone()
+    if not document or not os.path.exists(blob_path(document["sha256"])):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    return BlobResponse(
+        blob_path(document["sha256"]),
+        media_type=document["content_type"],
+        filename=document["filename"],
+        content_disposition_type="inline",
+        headers={"ETag": f'"{document["sha256"]}"', "Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+
+@app.get("/api/files/{document_id}")
+async def download_file(document_id: str):
+    return await send_document("id = %s", (document_id,))
+
 
-    file_path = f"{upload_dir}/{file.filename}"
+@app.get("/uploads/{filename}")
+async def download_file_by_name(filename: str):
+    # Chemin historique utilisé par le module GED (champ `fichier` = nom du fichier)
+    return await send_document("filename = %s", (filename,))
 
-    async with aiofiles.open(file_path, "wb") as f:
-        content = await file.read()
-        await f.write(content)
 
-    return {"filename": file.filename, "path": file_path}
+@app.delete("/api/files/{document_id}")
+async def delete_file(document_id: str):
+    async with get_db_connection() as conn:
+        async with conn.transaction():
+            orphans = await release_documents(conn, "id = %s", (document_id,))
+        await remove_blob_files(conn, orphans)
+    return {"message": "Fichier supprimé"}
 
 
 @app.delete("/api/rapport/{id}")
-def delete_report(id: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM rapport WHERE id = %s", (id,))
-    conn.close()
+async def delete_report(id: str):
+    orphans = []
+    async with get_db_connection() as conn:
+        async with conn.transaction():
+            cur = await conn.execute("DELETE FROM rapport WHERE id = %s RETURNING *", (id,))
+            old = await cur.fetchone()
+            if old:
+                await update_counters(conn, "rapport", old=old)
+                await record_deletion(conn, "rapport", id)
+                orphans = await release_documents(conn, "module = 'rapport' AND ref_id = %s", (id,))
+        await remove_blob_files(conn, orphans)
     return {"message": "Rapport supprimé"}
 
 
+# ================================
+# 🔵 ROUTE BOOTSTRAP (chargement initial + synchronisation)
+# ================================
+@app.get("/api/bootstrap")
+async def bootstrap(request: Request, response: Response, since: Optional[int] = None, modules: Optional[str] = None):
+    """Tous les modules en une réponse.
+
+    - `If-None-Match` : liste des ETags de module déjà connus du client ; ces
+      modules sont renvoyés sans lignes (`unchanged`), 304 si tous le sont.
+    - `since` : version renvoyée par la synchronisation précédente ; seules les
+      lignes modifiées et les ids supprimés depuis sont renvoyés.
+    """
+    names = modules.split(",") if modules else [m for m in MODULES if m != "rapport"]
+    for name in names:
+        get_module(name)
+    known = parse_if_none_match(request.headers.get("if-none-match"))
+
+    async with get_db_connection() as conn, conn.transaction():
+        # Snapshot unique : version, ETags et lignes sont cohérents entre eux
+        await conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        cur = await conn.execute(SNAPSHOT_VERSION)
+        version = (await cur.fetchone())["version"]
+        etags = await module_etags(conn, names)
+        global_etag = 'W/"' + hashlib.sha1("".join(etags.values()).encode()).hexdigest() + '"'
+
+        if all(etag in known for etag in etags.values()) or global_etag.removeprefix("W/") in known:
+            return Response(status_code=304, headers={"ETag": global_etag})
+
+        payload = {"version": version, "modules": {}}
+        for name in names:
+            if etags[name] in known:
+                payload["modules"][name] = {"etag": etags[name], "unchanged": True}
+                continue
+            table = MODULES[name]["table"]
+            if since is None:
+                cur = await conn.execute(f"SELECT {select_columns(name)} FROM {table}")
+                rows, deleted = await cur.fetchall(), []
+            else:
+                cur = await conn.execute(
+                    f"SELECT {select_columns(name)} FROM {table} WHERE row_version >= %s", (since,)
+                )
+                rows = await cur.fetchall()
+                cur = await conn.execute(
+                    "SELECT id FROM deleted_rows WHERE module = %s AND row_version >= %s", (name, since)
+                )
+                deleted = [row["id"] for row in await cur.fetchall()]
+            payload["modules"][name] = {
+                "etag": etags[name],
+                "full": since is None,
+                "rows": rows,
+                "deleted": deleted,
+            }
+
+    response.headers["ETag"] = global_etag
+    return payload
+
+
+# ================================
+# 🔵 ROUTES DASHBOARD / ALERTES
+# ================================
+ALERT_WINDOW_DAYS = 30
+
+
+@app.get("/api/dashboard/summary")
+async def dashboard_summary():
+    today = date.today()
+    horizon = today + timedelta(days=ALERT_WINDOW_DAYS)
+    async with get_db_connection() as conn:
+        cur = await conn.execute(
+            """
+            SELECT module, dimension, bucket, value FROM dashboard_counters
+            WHERE value <> 0 AND (dimension <> 'echeance' OR bucket <= %s)
+            """,
+            (horizon.isoformat(),),
+        )
+        rows = await cur.fetchall()
+
+    counts = {}
+    expirant = Counter()
+    en_retard = Counter()
+    for row in rows:
+        if row["dimension"] == "echeance":
+            if row["bucket"] < today.isoformat():
+                en_retard[row["module"]] += row["value"]
+            else:
+                expirant[row["module"]] += row["value"]
+        else:
+            counts[(row["module"], row["dimension"], row["bucket"])] = row["value"]
+
+    def n(module, dimension="total", *buckets):
+        return sum(counts.get((module, dimension, b), 0) for b in buckets or ("",))
+
+    mois = today.isoformat()[:7]
+    suivis = ["formations", "materiel", "visites", "epi", "plans"]
+    total_suivis = sum(n(m) for m in suivis)
+    total_aspects = n("aspects-environnementaux")
+    return {
+        "formationsExpirant": expirant["formations"],
+        "materielAControler": expirant["materiel"],
+        "visitesExpirant": expirant["visites"],
+        "epiExpirant": expirant["epi"],
+
+        "totalFormations": n("formations"),
+        "totalMateriel": n("materiel"),
+        "totalVisites": n("visites"),
+        "totalEPI": n("epi"),
+        "totalPlans": n("plans"),
+        "totalIncidents": n("incidents"),
+        "totalPermis": n("permis"),
+        "totalGED": n("ged"),
+        "totalPlanFormations": n("planformations"),
+        "totalPlanningHSE": n("planninghse"),
+        "totalVeilleReglementaire": n("veillereglementaire"),
+        "totalAspectsEnvironnementaux": total_aspects,
+
+        "plansEnCours": n("plans", "statut", "en_cours"),
+        "plansTermines": n("plans", "statut", "termine"),
+        "incidentsMois": n("incidents", "periode", mois),
+        "permisActifs": n("permis", "statut", "approuve", "en_cours"),
+        "permisEnAttente": n("permis", "statut", "en_attente"),
+        "formationsPlanifiees": n("planformations", "statut", "planifie", "en_cours"),
+        "activitesHSECeMois": n("planninghse", "periode", mois),
+        "aspectsSignificatifs": n("aspects-environnementaux", "statut", "significatif"),
+        "aspectsNonConformes": n("aspects-environnementaux", "conformite_reglementaire", "non_conforme"),
+        "emissions": n("aspects-environnementaux", "type", "emission"),
+        "dechets": n("aspects-environnementaux", "type", "dechet"),
+
+        "enRetard": dict(en_retard),
+        "totalEnRetard": sum(en_retard[m] for m in suivis),
+        "tauxConformite": (
+            round((total_suivis - sum(en_retard[m] for m in suivis)) / total_suivis * 100)
+            if total_suivis else 100
+        ),
+        "tauxConformiteEnvironnementale": (
+            round(n("aspects-environnementaux", "conformite_reglementaire", "conforme") / total_aspects * 100)
+            if total_aspects else 100
+        ),
+        "genereLe": datetime.now().isoformat(),
+    }
+
+
+# Alertes d'échéance : (expiré, urgent, à planifier) ; un message à None
+# désactive le niveau. `seuils` = jours restants pour urgent / à planifier.
+ALERTES_ECHEANCE = {
+    "formations": {
+        "type": "formation", "libelle": "intitule", "seuils": (7, 30),
+        "messages": (
+            'FORMATION EXPIRÉE: "{libelle}" a expiré il y a {jours} jours',
+            'FORMATION À RENOUVELER: "{libelle}" expire dans {jours} jours',
+            'FORMATION À PLANIFIER: "{libelle}" expire dans {jours} jours',
+        ),
+    },
+    "materiel": {
+        "type": "materiel", "libelle": "designation", "seuils": (7, 30),
+        "messages": (
+            'CONTRÔLE EN RETARD: "{libelle}" devrait être contrôlé il y a {jours} jours',
+            'CONTRÔLE URGENT: "{libelle}" à contrôler dans {jours} jours',
+            'CONTRÔLE À PLANIFIER: "{libelle}" à contrôler dans {jours} jours',
+        ),
+    },
+    "visites": {
+        "type": "visite", "libelle": "intitule", "seuils": (7, 30),
+        "messages": (
+            'VISITE EXPIRÉE: "{libelle}" a expiré il y a {jours} jours',
+            'VISITE URGENTE: "{libelle}" expire dans {jours} jours',
+            'VISITE À PLANIFIER: "{libelle}" expire dans {jours} jours',
+        ),
+    },
+    "epi": {
+        "type": "epi", "libelle": "typeEPI", "seuils": (7, 30),
+        "messages": (
+            'EPI EXPIRÉ: "{libelle}" a expiré il y a {jours} jours',
+            'EPI À RENOUVELER: "{libelle}" expire dans {jours} jours',
+            'EPI À COMMANDER: "{libelle}" expire dans {jours} jours',
+        ),
+    },
+    "plans": {
+        "type": "plan", "libelle": "titre", "seuils": (7, 7),
+        "statuts": ["en cours", "en_cours"],
+        "messages": (
+            'PLAN EN RETARD: "{libelle}" est en retard de {jours} jours',
+            'PLAN À FINALISER: "{libelle}" échéance dans {jours} jours',
+            None,
+        ),
+    },
+    "permis": {
+        "type": "permis", "libelle": "numero", "seuils": (0, 0),
+        "statuts": ["approuvé", "approuve", "en cours", "en_cours"],
+        "messages": (
+            'PERMIS EXPIRÉ: "{libelle}" a expiré il y a {jours} jours',
+            'PERMIS EXPIRE AUJOURD\'HUI: "{libelle}"',
+            None,
+        ),
+    },
+}
+
+# Alertes sur statut seul (pas d'échéance)
+ALERTES_STATUT = [
+    {
+        "module": "plans", "type": "plan", "libelle": "titre", "date": "dateDebut",
+        "statuts": ["en attente", "en_attente"], "priority": "medium", "icon": "Clock",
+        "message": 'PLAN EN ATTENTE: "{libelle}" nécessite une action',
+    },
+    {
+        "module": "permis", "type": "permis", "libelle": "numero", "date": "dateDebut",
+        "statuts": ["en attente", "en_attente"], "priority": "medium", "icon": "Clock",
+        "message": 'PERMIS EN ATTENTE: "{libelle}" nécessite approbation',
+    },
+    {
+        "module": "incidents", "type": "incident", "libelle": "typeIncident", "date": "date",
+        "statuts": ["en cours", "en_cours", "en investigation", "en_investigation"],
+        "priority": "medium", "icon": "AlertTriangle",
+        "message": 'INCIDENT NON RÉSOLU: "{libelle}" nécessite suivi',
+    },
+    {
+        "module": "planformations", "type": "planformation", "libelle": "intitule", "date": "dateDebut",
+        "statuts": ["en attente", "en_attente"], "priority": "medium", "icon": "Clock",
+        "message": 'PLAN FORMATION EN ATTENTE: "{libelle}" nécessite validation',
+    },
+    {
+        "module": "aspects-environnementaux", "vue": "gestionenvironnementale",
+        "type": "environnement", "libelle": "aspect", "date": "date_derniere_mesure",
+        "statuts": ["significatif"], "priority": "high", "icon": "AlertTriangle",
+        "message": 'ASPECT ENVIRONNEMENTAL SIGNIFICATIF: "{libelle}" nécessite attention',
+    },
+]
+
+PRIORITY_ORDER = {"critical": 1, "high": 2, "medium": 3, "low": 4}
+
+
+ALERT_LEVELS = (("critical", "AlertCircle"), ("high", "AlertTriangle"), ("medium", "Clock"))
+
+
+def alert_level(jours, seuils):
+    """0 = expiré, 1 = urgent (sous seuils[0] jours), 2 = à planifier."""
+    if jours < 0:
+        return 0
+    return 1 if jours <= seuils[0] else 2
+
+
+def alert_horizon(regle, today):
+    """Dernière échéance qui déclenche une alerte pour `regle`."""
+    seuil = regle["seuils"][1] if regle["messages"][2] is not None else regle["seuils"][0]
+    return today + timedelta(days=seuil)
+
+
+def alert_total(counters, today):
+    """Nombre total d'alertes d'après les lignes de dashboard_counters
+    (dimensions echeance et statut), sans relire les tables."""
+    statuts = {}
+    for regle in ALERTES_STATUT:
+        statuts.setdefault(regle["module"], set()).update(normalize(s) for s in regle["statuts"])
+    total = 0
+    for row in counters:
+        module, dimension = row["module"], row["dimension"]
+        if dimension == "echeance" and module in ALERTES_ECHEANCE:
+            if row["bucket"] <= alert_horizon(ALERTES_ECHEANCE[module], today).isoformat():
+                total += row["value"]
+        elif dimension == "statut" and row["bucket"] in statuts.get(module, ()):
+            total += row["value"]
+    return total
+
+
+@app.get("/api/alerts")
+async def get_alerts(limit: int = 200):
+    """Les `limit` alertes les plus prioritaires et leur nombre total.
+
+    Chaque source est lue triée et limitée en SQL (index (échéance, id)) ;
+    la priorité croît avec l'échéance, donc les `limit` premières alertes
+    sont parmi les `limit` premières lignes de chaque source. Le total vient
+    des compteurs du dashboard.
+    """
+    today = date.today()
+    limit = max(0, limit)
+    notifications = []
+    async with get_db_connection() as conn:
+        for module, regle in ALERTES_ECHEANCE.items():
+            config = MODULES[module]
+            champ = config["echeance"]
+            query = (
+                f"SELECT {regle['libelle']} AS libelle, {champ} AS echeance "
+                f"FROM {config['table']} WHERE {champ} <= %s"
+            )
+            params = [alert_horizon(regle, today)]
+            if "statuts" in regle:
+                query += " AND lower(statut) = ANY(%s)"
+                params.append(regle["statuts"])
+            query += f" ORDER BY {champ}, id LIMIT %s"
+            params.append(limit)
+            cur = await conn.execute(query, params)
+            for row in await cur.fetchall():
+                day = date_key(row["echeance"])
+                if day is None:
+                    continue
+                jours = (date.fromisoformat(day) - today).days
+                niveau = alert_level(jours, regle["seuils"])
+                if regle["messages"][niveau] is None:
+                    continue
+                priority, icon = ALERT_LEVELS[niveau]
+                notifications.append({
+                    "msg": regle["messages"][niveau].format(libelle=row["libelle"], jours=abs(jours)),
+                    "type": regle["type"],
+                    "priority": priority,
+                    "module": module,
+                    "date": day,
+                    "joursRestants": jours,
+                    "icon": icon,
+                })
+
+        for regle in ALERTES_STATUT:
+            config = MODULES[regle["module"]]
+            cur = await conn.execute(
+                f"SELECT {regle['libelle']} AS libelle, {regle['date']} AS date "
+                f"FROM {config['table']} WHERE lower(statut) = ANY(%s) ORDER BY id LIMIT %s",
+                (regle["statuts"], limit),
+            )
+            for row in await cur.fetchall():
+                notifications.append({
+                    "msg": regle["message"].format(libelle=row["libelle"]),
+                    "type": regle["type"],
+                    "priority": regle["priority"],
+                    "module": regle.get("vue", regle["module"]),
+                    "date": row["date"],
+                    "joursRestants": 999,
+                    "icon": regle["icon"],
+                })
+
+        cur = await conn.execute(
+            """
+            SELECT module, dimension, bucket, value FROM dashboard_counters
+            WHERE value <> 0 AND dimension IN ('echeance', 'statut')
+            """
+        )
+        total = alert_total(await cur.fetchall(), today)
+
+    notifications.sort(key=lambda a: (PRIORITY_ORDER[a["priority"]], a["joursRestants"]))
+    return {"total": total, "notifications": notifications[:limit]}
+
+
+WITHIN_PATTERN = re.compile(r"^(\d+)d?$")
+# Borne de within : un horizon trop lointain ferait déborder date.today() + within
+WITHIN_MAX_DAYS = 3650
+
+
+@app.get("/api/expirations")
+async def get_expirations(within: str = "30d"):
+    """Échéances dépassées (`enRetard`) et à venir sous `within` jours
+    (`aEcheance`), par module et par département."""
+    match = WITHIN_PATTERN.match(within.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Paramètre within invalide (ex. 30d)")
+    within_days = int(match.group(1))
+    if within_days > WITHIN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Paramètre within limité à {WITHIN_MAX_DAYS} jours")
+
+    snapshot = app.state.expirations
+    if snapshot is None or snapshot["today"] != date.today() or within_days > snapshot["horizon"]:
+        async with get_db_connection() as conn:
+            snapshot = await fetch_expirations(conn, within_days)
+    return {
+        "within": within_days,
+        "calculeLe": snapshot["calculeLe"],
+        "modules": summarize_expirations(snapshot, within_days),
+    }
+
+
+# ================================
+# 🔵 ROUTE RECHERCHE
+# ================================
+SEARCH_MODULES = [module for module, config in MODULES.items() if config.get("recherche")]
+
+
+@app.get("/api/search")
+async def search(q: str, modules: Optional[str] = None, limit: int = 20):
+    """Recherche plein texte (stemming français, syntaxe web : "phrase exacte",
+    OR, -exclu) dans GED, rapports, veille réglementaire et contenu des
+    fichiers. Résultats classés, extraits surlignés par <mark>."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Paramètre q vide")
+    names = modules.split(",") if modules else [*SEARCH_MODULES, SEARCH_FILES]
+    unknown = [name for name in names if name not in (*SEARCH_MODULES, SEARCH_FILES)]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Recherche impossible dans : {', '.join(unknown)}")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    parts = [SEARCH_FILES_QUERY if name == SEARCH_FILES else search_module_query(name) for name in names]
+    params = {"q": q, "limit": limit, "options": SEARCH_HEADLINE}
+    params.update({f"module_{name}": name for name in names})
+    async with get_db_connection() as conn:
+        cur = await conn.execute(
+            " UNION ALL ".join(parts) + " ORDER BY rank DESC LIMIT %(limit)s", params
+        )
+        rows = await cur.fetchall()
+
+    results = []
+    for row in rows:
+        result = {
+            "module": row["module"],
+            "id": row["id"],
+            "titre": row["titre"],
+            "extrait": row["extrait"],
+            "score": round(row["rank"], 4),
+        }
+        if row["module"] == SEARCH_FILES:
+            result.update(source=row["source"], refId=row["ref_id"], url=f"/api/files/{row['id']}")
+        results.append(result)
+    return {"q": q, "total": len(results), "resultats": results}
+
+
+# ================================
+# 🔵 ROUTES MODULES (liste générique)
+# ================================
+# Déclarées après les routes /api/<nom> fixes (bootstrap, alerts...) qui
+# seraient sinon capturées par /api/{module}.
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+LIST_STREAM_BATCH = 1000
+LIST_PARAMS = {"limit", "cursor", "sort", "fields", "format", "q", "q_fields"}
+RANGE_SUFFIXES = {"_min": ">=", "_max": "<="}
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+@lru_cache(maxsize=None)
+def field_adapter(annotation):
+    return TypeAdapter(annotation)
+
+
+def parse_field_value(field, value):
+    """Valeur de paramètre convertie au type du champ (ValidationError sinon) :
+    un filtre ou un curseur mal formé est refusé avant d'atteindre PostgreSQL."""
+    return field_adapter(field.annotation).validate_python(value)
+
+
+def decode_cursor(cursor, model_fields, sort_field, nullable=False):
+    """Paire [valeur de tri, id] typée ; 400 pour tout autre contenu."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != 2 or (values[0] is None and not nullable):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    try:
+        value = None if values[0] is None else parse_field_value(model_fields[sort_field], values[0])
+        return [value, parse_field_value(model_fields["id"], values[1])]
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
+
+def build_list_query(module, query_params, sort=None, fields=None, cursor=None):
+    """SELECT paginé par clé : filtres, tri, projection et position du curseur.
+
+    Filtres : `<champ>=valeur` (répétable), `<champ>_min` / `<champ>_max` (bornes
+    incluses, ex. dateExpiration_max=2026-12-31), `q` : texte contenu (sans
+    casse) dans l'un des champs `q_fields` (tous les champs texte par
+    défaut), comme la recherche des listes. Tri : `sort=champ` ou
+    `sort=-champ`. Le curseur est la paire (champ de tri, id) de la dernière
+    ligne renvoyée ; id sert de départage pour garder un ordre total.
+
+    Sur une colonne NULL-able, l'ordre par défaut de PostgreSQL est gardé
+    (NULL en dernier en croissant, en premier en décroissant : même sens que
+    l'index) et le curseur traverse explicitement la zone des NULL.
+    """
+    config = get_module(module)
+    model_fields = config["model"].model_fields
+
+    sort = sort or "id"
+    descending = sort.startswith("-")
+    sort_field = sort.lstrip("-")
+    if sort_field not in model_fields:
+        raise HTTPException(status_code=400, detail=f"Tri impossible sur : {sort_field}")
+    nullable = sort_field in NULLABLE_COLUMNS.get(config["table"], ())
+
+    if fields:
+        names = list(dict.fromkeys(["id", sort_field, *fields.split(",")]))
+        unknown = [f for f in names if f not in model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Champs inconnus : {', '.join(unknown)}")
+    else:
+        names = list(model_fields)
+    columns = ", ".join(f'{name} AS "{name}"' for name in names)
+
+    where, args = [], []
+    for key in query_params.keys():
+        if key in LIST_PARAMS:
+            continue
+        field, operator = key, None
+        for suffix, op in RANGE_SUFFIXES.items():
+            if key.endswith(suffix) and key.removesuffix(suffix) in model_fields:
+                field, operator = key.removesuffix(suffix), op
+        if field not in model_fields:
+            raise HTTPException(status_code=400, detail=f"Filtre inconnu : {key}")
+        try:
+            values = [parse_field_value(model_fields[field], v) for v in query_params.getlist(key)]
+        except ValidationError:
+            raise HTTPException(status_code=400, detail=f"Valeur invalide pour le filtre : {key}")
+        if operator:
+            where.append(f"{field} {operator} %s")
+            args.append(values[-1])
+        else:
+            where.append(f"{field} = ANY(%s::{sql_type(model_fields[field])}[])")
+            args.append(values)
+
+    if query_params.get("q"):
+        text_fields = [f for f in model_fields if sql_type(model_fields[f]) == "TEXT"]
+        q_fields = query_params.get("q_fields")
+        q_fields = q_fields.split(",") if q_fields else text_fields
+        unknown = [f for f in q_fields if f not in text_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Recherche impossible sur : {', '.join(unknown)}")
+        pattern = "%" + re.sub(r"([\\%_])", r"\\\1", query_params["q"]) + "%"
+        where.append("(" + " OR ".join(f"{f} ILIKE %s" for f in q_fields) + ")")
+        args.extend([pattern] * len(q_fields))
+
+    direction = "DESC" if descending else "ASC"
+    comparison = "<" if descending else ">"
+    if cursor:
+        last = decode_cursor(cursor, model_fields, sort_field, nullable)
+        value, last_id = last
+        if sort_field == "id":
+            where.append(f"id {comparison} %s")
+            args.append(last_id)
+        elif not nullable:
+            where.append(f"({sort_field}, id) {comparison} (%s, %s)")
+            args.extend(last)
+        elif value is None and not descending:
+            # Déjà dans les NULL, rangés en fin de liste
+            where.append(f"({sort_field} IS NULL AND id > %s)")
+            args.append(last_id)
+        elif value is None:
+            # NULL en tête : finir les NULL, puis toutes les valeurs
+            where.append(f"(({sort_field} IS NULL AND id < %s) OR {sort_field} IS NOT NULL)")
+            args.append(last_id)
+        elif not descending:
+            where.append(f"(({sort_field}, id) > (%s, %s) OR {sort_field} IS NULL)")
+            args.extend(last)
+        else:
+            # Les NULL, en tête, sont déjà passés
+            where.append(f"({sort_field}, id) < (%s, %s)")
+            args.extend(last)
+
+    query = f"SELECT {columns} FROM {config['table']}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    if sort_field == "id":
+        query += f" ORDER BY id {direction}"
+    else:
+        query += f" ORDER BY {sort_field} {direction}, id {direction}"
+    return query, args, sort_field
+
+
+async def fetch_batches(query, args):
+    """Lots de lignes lus depuis un curseur serveur (rien n'est matérialisé)."""
+    async with get_db_connection() as conn, conn.transaction():
+        async with conn.cursor(name="stream") as cur:
+            await cur.execute(query, args)
+            while rows := await cur.fetchmany(LIST_STREAM_BATCH):
+                yield rows
+
+
+async def stream_ndjson(query, args):
+    """Une ligne JSON par enregistrement."""
+    async for rows in fetch_batches(query, args):
+        yield "".join(json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in rows)
+
+
+async def stream_json_array(query, args):
+    """Tableau JSON complet, écrit lot par lot."""
+    separator = "["
+    async for rows in fetch_batches(query, args):
+        for row in rows:
+            yield separator + json.dumps(row, default=str, ensure_ascii=False)
+            separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+@app.get("/api/{module}")
+async def list_module(
+    module: str,
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = "json",
+):
+    """Liste d'un module.
+
+    Sans `limit` ni `cursor`, toutes les lignes filtrées sont renvoyées (tableau
+    JSON diffusé par lots, comme avant la pagination). `format=ndjson` diffuse
+    de même une ligne JSON par enregistrement. Avec `limit` et/ou `cursor`, la
+    réponse est une page (LIST_DEFAULT_LIMIT lignes par défaut) et l'en-tête
+    `X-Next-Cursor` donne le curseur de la page suivante.
+    """
+    query, args, sort_field = build_list_query(module, request.query_params, sort, fields, cursor)
+
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(query, args), media_type="application/x-ndjson")
+    if format != "json":
+        raise HTTPException(status_code=400, detail=f"Format inconnu : {format}")
+
+    async with get_db_connection() as conn:
+        etag = (await module_etags(conn, [module]))[module]
+    etag = 'W/"' + hashlib.sha1((etag + str(request.query_params)).encode()).hexdigest() + '"'
+    if etag.removeprefix("W/") in parse_if_none_match(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if limit is None and cursor is None:
+        return StreamingResponse(
+            stream_json_array(query, args), media_type="application/json", headers={"ETag": etag}
+        )
+
+    limit = max(1, min(limit or LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT))
+    async with get_db_connection() as conn:
+        # Une ligne de plus que demandé pour savoir s'il existe une page suivante
+        cur = await conn.execute(f"{query} LIMIT %s", [*args, limit + 1])
+        rows = await cur.fetchall()
+
+    headers = {"ETag": etag}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor([rows[-1][sort_field], rows[-1]["id"]])
+    return JSONResponse(content=jsonable_encoder(rows), headers=headers)
+
+
+# Titre, nom de fichier et colonnes (champ, libellé) des exports ; mêmes
+# libellés que les exports faits jusqu'ici dans le navigateur (exportUtils.js).
+# Le champ `etat` est calculé (voir EXPORT_ETATS), les autres sont lus tels
+# quels : Statut reste la valeur enregistrée, réimportable.
+EXPORTS = {
+    "formations": ("Liste des Formations", "formations", [
+        ("nom", "Nom"), ("prenom", "Prénom"), ("departement", "Département"),
+        ("fonction", "Fonction"), ("typeFormation", "Type Formation"), ("intitule", "Intitulé"),
+        ("centreFormation", "Centre Formation"), ("dateFormation", "Date Formation"),
+        ("dateExpiration", "Date Expiration"),
+    ]),
+    "materiel": ("Liste du Matériel", "materiel", [
+        ("categorie", "Catégorie"), ("designation", "Désignation"), ("numeroSerie", "N° Série"),
+        ("caracteristiques", "Caractéristiques"), ("dateControle", "Date Contrôle"),
+        ("prochainControle", "Prochain Contrôle"), ("statut", "Statut"), ("etat", "État"),
+    ]),
+    "visites": ("Liste des Visites Médicales", "visites", [
+        ("nom", "Nom"), ("prenom", "Prénom"), ("departement", "Département"),
+        ("fonction", "Fonction"), ("typeVisite", "Type Visite"), ("intitule", "Intitulé"),
+        ("centreMedical", "Centre Médical"), ("dateVisite", "Date Visite"),
+        ("dateExpiration", "Date Expiration"), ("etat", "État"),
+    ]),
+    "plans": ("Liste des Plans d'Action", "plans-action", [
+        ("titre", "Titre"), ("description", "Description"), ("responsable", "Responsable"),
+        ("departement", "Département"), ("dateDebut", "Date Début"), ("dateEcheance", "Date Échéance"),
+        ("priorite", "Priorité"), ("avancement", "Avancement"), ("statut", "Statut"),
+        ("processus", "Processus"), ("mesureEfficacite", "Mesure Efficacité"), ("commentaire", "Commentaire"),
+    ]),
+    "epi": ("Liste des EPI", "epi", [
+        ("employe", "Employé"), ("departement", "Département"), ("typeEPI", "Type EPI"),
+        ("marque", "Marque"), ("taille", "Taille"), ("dateRemise", "Date Remise"),
+        ("dateExpiration", "Date Expiration"), ("statut", "Statut"), ("etat", "État"),
+    ]),
+    "incidents": ("Liste des Incidents", "incidents", [
+        ("type", "Type"), ("typeIncident", "Type Incident"), ("gravite", "Gravité"), ("date", "Date"),
+        ("heure", "Heure"), ("lieu", "Lieu"), ("description", "Description"), ("personne", "Personne"),
+        ("temoin", "Témoin"), ("action", "Action"), ("statut", "Statut"),
+    ]),
+    "permis": ("Liste des Permis de Travail", "permis", [
+        ("numero", "Numéro"), ("typeTravail", "Type Travail"), ("localisation", "Localisation"),
+        ("demandeur", "Demandeur"), ("executant", "Exécutant"), ("departement", "Département"),
+        ("descriptionTache", "Description Tâche"), ("equipement", "Équipement"),
+        ("dateDebut", "Date Début"), ("dateFin", "Date Fin"), ("heureDebut", "Heure Début"),
+        ("heureFin", "Heure Fin"), ("statut", "Statut"),
+    ]),
+    "ged": ("Liste des Documents GED", "ged-documents", [
+        ("titre", "Titre"), ("type", "Type"), ("categorie", "Catégorie"), ("description", "Description"),
+        ("dateCreation", "Date Création"), ("dateModification", "Date Modification"),
+        ("auteur", "Auteur"), ("statut", "Statut"), ("fichier", "Fichier"),
+    ]),
+    "planformations": ("Plan de Formations", "plan-formations", [
+        ("intitule", "Intitulé"), ("typeFormation", "Type Formation"), ("description", "Description"),
+        ("publicCible", "Public Cible"), ("formateur", "Formateur"), ("dateDebut", "Date Début"),
+        ("dateFin", "Date Fin"), ("duree", "Durée"), ("lieu", "Lieu"), ("cout", "Coût (€)"),
+        ("statut", "Statut"),
+    ]),
+    "planninghse": ("Planning des Activités HSE", "planning-hse", [
+        ("titre", "Titre"), ("typeActivite", "Type Activité"), ("description", "Description"),
+        ("dateDebut", "Date Début"), ("dateFin", "Date Fin"), ("heureDebut", "Heure Début"),
+        ("heureFin", "Heure Fin"), ("lieu", "Lieu"), ("responsable", "Responsable"),
+        ("priorite", "Priorité"), ("statut", "Statut"),
+    ]),
+    "veillereglementaire": ("Veille Réglementaire", "veille-reglementaire", [
+        ("reference", "Référence"), ("titre", "Titre"), ("typeReglementation", "Type"),
+        ("organisme", "Organisme"), ("datePublication", "Date Publication"),
+        ("dateApplication", "Date Application"), ("statut", "Statut"), ("impact", "Impact"),
+        ("description", "Description"),
+    ]),
+    "aspects-environnementaux": ("Registre Environnemental", "registre-environnemental", [
+        ("aspect", "Aspect"), ("type", "Type"), ("categorie", "Catégorie"),
+        ("activite_source", "Activité Source"), ("localisation", "Localisation"),
+        ("description", "Description"), ("condition_fonctionnement", "Condition"),
+        ("impact_environnemental", "Impact"), ("criticite", "Criticité"), ("statut", "Statut"),
+        ("indicateur", "Indicateur"), ("unite_mesure", "Unité"), ("methode_suivi", "Méthode Suivi"),
+        ("frequence_mesure", "Fréquence"), ("cible", "Cible"), ("objectif", "Objectif"),
+        ("donnees_mesurees", "Données Mesurées"), ("date_derniere_mesure", "Dernière Mesure"),
+        ("responsable", "Responsable"), ("mesures_maitrise", "Mesures Maîtrise"),
+        ("plan_actions", "Plan Actions"), ("conformite_reglementaire", "Conformité"),
+    ]),
+    "rapport": ("Liste des Rapports", "rapports", [
+        ("titre", "Titre"), ("auteur", "Auteur"), ("date", "Date"), ("contenu", "Contenu"),
+    ]),
+}
+# Colonne id des exports CSV / XLSX : réimportés via /bulk, les lignes mettent
+# à jour les enregistrements existants au lieu d'en créer des copies.
+EXPORT_ID_COLUMN = ("id", "ID")
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+# État affiché par les listes (getStatusText des composants) : statuts
+# bloquants tels quels, sinon selon les jours restants avant l'échéance.
+# module -> (statuts gardés, libellé échéance dépassée, libellé valide)
+EXPORT_ETATS = {
+    "epi": (("Hors service", "En réparation"), "Expiré", "En service"),
+    "materiel": (("Non conforme", "En maintenance"), "À contrôler", "Conforme"),
+    "visites": ((), "Expiré", "Valide"),
+}
+EXPORT_ETAT_JOURS = 30
+
+
+def export_etat(module, row, today):
+    gardes, depasse, valide = EXPORT_ETATS[module]
+    if row.get("statut") in gardes:
+        return row["statut"]
+    day = date_key(row[MODULES[module]["echeance"]])
+    if day is None:
+        return valide
+    jours = (date.fromisoformat(day) - today).days
+    if jours < 0:
+        return depasse
+    if jours <= EXPORT_ETAT_JOURS:
+        return f"{jours}j restants"
+    return valide
+
+
+def is_date_field(name):
+    return name.startswith("date") or name == "prochainControle"
+
+
+def export_value(field, value):
+    """Mise en forme d'une cellule comme dans le navigateur (dates fr-FR)."""
+    if value is None:
+        return ""
+    if field == "avancement":
+        return f"{value}%"
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    if is_date_field(field):
+        day = date_key(value)
+        if day:
+            return date.fromisoformat(day).strftime("%d/%m/%Y")
+    return value
+
+
+def export_rows(module, columns, rows):
+    today = date.today()
+    return [
+        [export_etat(module, row, today) if f == "etat" else export_value(f, row[f]) for f, _ in columns]
+        for row in rows
+    ]
+
+
+async def stream_export_csv(module, query, args, columns):
+    writer = CsvTableWriter([label for _, label in columns])
+    yield writer.flush()
+    async for rows in fetch_batches(query, args):
+        writer.add_rows(export_rows(module, columns, rows))
+        yield writer.flush()
+
+
+async def stream_and_remove(path):
+    try:
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+@app.get("/api/{module}/export")
+async def export_module(module: str, request: Request, format: str = "csv", sort: Optional[str] = None):
+    """Export CSV / XLSX / PDF d'un module, mêmes filtres que la liste.
+
+    Les lignes sont lues par lots : la mémoire ne dépend pas du nombre de
+    lignes. Le CSV est diffusé au fil de la lecture ; XLSX et PDF sont écrits
+    dans un fichier temporaire (le format l'impose) puis diffusés par blocs.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Format inconnu : {format}")
+    query, args, _ = build_list_query(module, request.query_params, sort)
+    title, filename, columns = EXPORTS[module]
+    if format != "pdf":
+        columns = [EXPORT_ID_COLUMN, *columns]
+    filename = f"{filename}_{date.today().isoformat()}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "csv":
+        return StreamingResponse(
+            stream_export_csv(module, query, args, columns), media_type=EXPORT_MEDIA_TYPES[format], headers=headers
+        )
+
+    fd, path = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    try:
+        labels = [label for _, label in columns]
+        if format == "xlsx":
+            writer = XlsxTableWriter(path, module, labels)
+        else:
+            writer = PdfTableWriter(path, title, labels)
+        async for rows in fetch_batches(query, args):
+            await anyio.to_thread.run_sync(writer.add_rows, export_rows(module, columns, rows))
+        await anyio.to_thread.run_sync(writer.close)
+    except BaseException:
+        os.remove(path)
+        raise
+    return StreamingResponse(stream_and_remove(path), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
+# ================================
+# 🔵 IMPORT EN MASSE
+# ================================
+FR_DATE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+
+
+def bulk_header_map(module):
+    """En-têtes acceptés -> champ : nom du champ ou libellé d'export."""
+    mapping = {normalize(name): name for name in MODULES[module]["model"].model_fields}
+    if module in EXPORTS:
+        mapping.update({normalize(label): field for field, label in EXPORTS[module][2]})
+    return mapping
+
+
+def read_json_rows(payload, header_map):
+    for line, raw in enumerate(payload, start=1):
+        if not isinstance(raw, dict):
+            raw = {}
+        yield line, {header_map.get(normalize(k), k): v for k, v in raw.items()}
+
+
+def read_csv_rows(fileobj, header_map):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        dialect = csv.Sniffer().sniff(text.read(8192), delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    text.seek(0)
+    reader = csv.reader(text, dialect)
+    header = [header_map.get(normalize(h), h) for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield line, dict(zip(header, values))
+    text.detach()
+
+
+def read_xlsx_rows(fileobj, header_map):
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [header_map.get(normalize(h), h) for h in next(rows, [])]
+        for line, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def coerce_row(model, raw):
+    """Valeurs de tableur -> types du modèle (dates Excel/fr-FR, nombres en texte)."""
+    data = {}
+    for key, value in raw.items():
+        field = model.model_fields.get(key)
+        if field is None:
+            continue
+        text_field = field.annotation is str or str in get_args(field.annotation)
+        if isinstance(value, datetime):
+            value = value.date()
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, str):
+            value = value.strip()
+            if value == "" and not field.is_required():
+                value = None
+            elif is_date_field(key) and FR_DATE.match(value):
+                day, month, year = FR_DATE.match(value).groups()
+                value = f"{year}-{month}-{day}"
+            elif not text_field:
+                value = value.rstrip("%").replace(",", ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and text_field:
+            value = str(int(value)) if float(value).is_integer() else str(value)
+        data[key] = value
+    return data
+
+
+def validate_bulk_rows(module, rows):
+    """Valide les lignes avec le modèle du module ; le dernier doublon d'id gagne."""
+    model = MODULES[module]["model"]
+    valid, lines, errors = {}, {}, []
+    for line, raw in rows:
+        data = coerce_row(model, raw)
+        if not data.get("id"):
+            data["id"] = uuid.uuid4().hex
+        try:
+            item = model.model_validate(data)
+        except ValidationError as exc:
+            errors.append({
+                "ligne": line,
+                "id": data["id"],
+                "erreurs": [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()],
+            })
+            continue
+        if item.id in lines:
+            errors.append({
+                "ligne": lines[item.id],
+                "id": item.id,
+                "erreurs": [f"id en double, remplacé par la ligne {line}"],
+            })
+        lines[item.id] = line
+        valid[item.id] = item
+    return list(valid.values()), errors
+
+
+async def bulk_upsert(conn, module, items):
+    """COPY dans une table temporaire puis un seul INSERT ... ON CONFLICT."""
+    config = MODULES[module]
+    table = config["table"]
+    fields = list(config["model"].model_fields)
+    columns = ", ".join(fields)
+    updates = ", ".join(f"{f} = EXCLUDED.{f}" for f in fields if f != "id")
+
+    await conn.execute(
+        f"CREATE TEMP TABLE bulk_staging ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA",
+        prepare=False,
+    )
+    async with conn.cursor() as cur:
+        async with cur.copy(f"COPY bulk_staging ({columns}) FROM STDIN") as copy:
+            for item in items:
+                await copy.write_row([getattr(item, f) for f in fields])
+
+    # Valeurs remplacées, pour corriger les compteurs du dashboard
+    cur = await conn.execute(
+        f"SELECT {select_columns(module)} FROM {table} WHERE id IN (SELECT id FROM bulk_staging) FOR UPDATE",
+        prepare=False,
+    )
+    replaced = await cur.fetchall()
+    cur = await conn.execute(
+        f"""
+        INSERT INTO {table} ({columns}) SELECT {columns} FROM bulk_staging
+        ON CONFLICT (id) DO UPDATE SET {updates}, row_version = DEFAULT, updated_at = DEFAULT
+        RETURNING (xmax = 0) AS inserted
+        """,
+        prepare=False,
+    )
+    inserted = sum(1 for row in await cur.fetchall() if row["inserted"])
+    await update_counters_many(conn, module, replaced, [item.model_dump() for item in items])
+    return inserted
+
+
+@app.post("/api/{module}/bulk")
+async def bulk_import(module: str, request: Request):
+    """Création / mise à jour en masse : tableau JSON, ou fichier CSV / XLSX
+    envoyé en multipart (champ `file`). En-têtes = noms des champs ou libellés
+    des exports. Une ligne avec un id (colonne ID des exports CSV / XLSX) met
+    à jour cet enregistrement, une ligne sans id en crée un. Les lignes
+    valides sont chargées en une transaction, les autres sont listées dans
+    `erreurs` avec leur numéro de ligne.
+    """
+    get_module(module)
+    header_map = bulk_header_map(module)
+    content_type = request.headers.get("content-type", "")
+
+    form = None
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, StarletteUploadFile):
+            raise HTTPException(status_code=400, detail="Champ `file` manquant")
+        reader = read_xlsx_rows if (upload.filename or "").lower().endswith(".xlsx") else read_csv_rows
+        rows = reader(upload.file, header_map)
+    elif content_type.startswith("text/csv"):
+        rows = read_csv_rows(io.BytesIO(await request.body()), header_map)
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON invalide")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Un tableau JSON est attendu")
+        rows = read_json_rows(payload, header_map)
+
+    try:
+        items, errors = await anyio.to_thread.run_sync(validate_bulk_rows, module, rows)
+    except (UnicodeDecodeError, csv.Error, ValueError, zipfile.BadZipFile, InvalidFileException) as exc:
+        raise HTTPException(status_code=400, detail=f"Fichier illisible : {exc}")
+    finally:
+        if form is not None:
+            await form.close()
+
+    inserted = 0
+    if items:
+        async with get_db_connection() as conn, conn.transaction():
+            inserted = await bulk_upsert(conn, module, items)
+        notify_expirations(module)
+
+    return {
+        "total": len(items) + len(errors),
+        "inseres": inserted,
+        "mis_a_jour": len(items) - inserted,
+        "rejetes": len(errors),
+        "erreurs": sorted(errors, key=lambda e: e["ligne"]),
+    }
+
+
 # ================================
 # 🔵 ROUTES GLOBALES
 # ================================
@@ -169,6 +2602,12 @@ def health():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    # async : rendu dans la boucle, qui est seule à modifier les métriques
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ================================
 # 🔵 LANCEMENT LOCAL
 # ================================
@@ -0,0 +1,126 @@
+import bisect
+import math
+
+
+# ================================
+# 🔵 MÉTRIQUES (format texte Prometheus)
+# ================================
+# Compteurs, jauges et histogrammes en mémoire du processus, mis à jour depuis
+# la boucle asyncio (pas de verrou). Avec plusieurs workers uvicorn, chaque
+# worker expose ses propres valeurs : Prometheus les agrège par instance.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labels, key)} {format_number(value)}"
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.values[self.key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values[key] = (counts, total + value)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{format_number(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, key)} {format_number(total)}"
+            yield f"{self.name}_count{format_labels(self.labels, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        # Fonctions appelées avant chaque rendu (jauges lues à la demande)
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(CounterMetric(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(GaugeMetric(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(HistogramMetric(name, help, labels, buckets))
+
+    def collector(self, func):
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        for collect in self.collectors:
+            collect()
+        lines = [line for metric in self.metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
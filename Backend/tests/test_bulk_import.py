@@ -0,0 +1,120 @@
+import io
+from datetime import date, datetime
+
+from openpyxl import Workbook
+
+from exports import CsvTableWriter
+from main import (
+    EPI, EXPORT_ID_COLUMN, EXPORTS, PlanAction, PlanFormation, bulk_header_map,
+    coerce_row, export_rows, read_csv_rows, read_xlsx_rows, validate_bulk_rows,
+)
+
+EPI_ROW = {
+    "id": "e1", "employe": "Alice", "departement": "Prod", "typeEPI": "Casque",
+    "marque": "3M", "taille": "L", "dateRemise": "2026-01-15",
+    "dateExpiration": "2027-01-15", "statut": "En service",
+}
+
+
+def csv_bytes(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+# ----- coerce_row -----
+
+def test_coerce_row_reads_fr_dates():
+    data = coerce_row(EPI, {"dateRemise": "15/01/2026", "dateExpiration": "2027-01-15"})
+    assert data == {"dateRemise": "2026-01-15", "dateExpiration": "2027-01-15"}
+
+
+def test_coerce_row_reads_excel_dates():
+    data = coerce_row(EPI, {"dateRemise": datetime(2026, 1, 15, 0, 0), "dateExpiration": date(2027, 1, 15)})
+    assert data == {"dateRemise": "2026-01-15", "dateExpiration": "2027-01-15"}
+
+
+def test_coerce_row_reads_percent_and_decimal_comma():
+    assert coerce_row(PlanAction, {"avancement": "40%"}) == {"avancement": "40"}
+    assert coerce_row(PlanFormation, {"cout": "1250,50"}) == {"cout": "1250.50"}
+
+
+def test_coerce_row_keeps_numbers_in_text_columns_as_text():
+    assert coerce_row(EPI, {"taille": 42, "marque": 3.5, "id": 7.0}) == {
+        "taille": "42", "marque": "3.5", "id": "7",
+    }
+
+
+def test_coerce_row_drops_unknown_columns_and_strips_text():
+    assert coerce_row(EPI, {"État": "Expiré", "employe": "  Alice "}) == {"employe": "Alice"}
+
+
+# ----- validate_bulk_rows -----
+
+def test_validate_bulk_rows_reports_line_numbers():
+    rows = [(2, EPI_ROW), (3, {**EPI_ROW, "id": "e2", "dateRemise": "demain"})]
+    items, errors = validate_bulk_rows("epi", rows)
+    assert [item.id for item in items] == ["e1"]
+    assert errors[0]["ligne"] == 3 and errors[0]["id"] == "e2"
+    assert errors[0]["erreurs"][0].startswith("dateRemise:")
+
+
+def test_validate_bulk_rows_last_duplicate_wins():
+    rows = [(2, EPI_ROW), (3, {**EPI_ROW, "taille": "XL"})]
+    items, errors = validate_bulk_rows("epi", rows)
+    assert [(item.id, item.taille) for item in items] == [("e1", "XL")]
+    assert errors == [{"ligne": 2, "id": "e1", "erreurs": ["id en double, remplacé par la ligne 3"]}]
+
+
+def test_validate_bulk_rows_generates_missing_ids():
+    items, errors = validate_bulk_rows("epi", [(2, {**EPI_ROW, "id": ""}), (3, {**EPI_ROW, "id": None})])
+    assert errors == []
+    assert len({item.id for item in items}) == 2
+
+
+# ----- lecteurs de fichiers -----
+
+def test_read_csv_rows_sniffs_semicolon_and_maps_export_labels():
+    text = "\ufeffEmployé;Type EPI;Date Remise\nAlice;Casque;15/01/2026\n;;\nBob;Gants;16/01/2026\n"
+    rows = list(read_csv_rows(csv_bytes(text), bulk_header_map("epi")))
+    assert rows == [
+        (2, {"employe": "Alice", "typeEPI": "Casque", "dateRemise": "15/01/2026"}),
+        (4, {"employe": "Bob", "typeEPI": "Gants", "dateRemise": "16/01/2026"}),
+    ]
+
+
+def test_read_csv_rows_sniffs_comma_and_field_names():
+    text = 'employe,marque,taille\nAlice,"3M, Inc",L\n'
+    rows = list(read_csv_rows(csv_bytes(text), bulk_header_map("epi")))
+    assert rows == [(2, {"employe": "Alice", "marque": "3M, Inc", "taille": "L"})]
+
+
+def test_read_xlsx_rows_keeps_cell_types():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["ID", "Taille", "Date Remise"])
+    sheet.append([12, 42, datetime(2026, 1, 15)])
+    sheet.append([None, None, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    rows = list(read_xlsx_rows(buffer, bulk_header_map("epi")))
+    assert rows == [(2, {"id": 12, "taille": 42, "dateRemise": datetime(2026, 1, 15)})]
+    assert coerce_row(EPI, rows[0][1]) == {"id": "12", "taille": "42", "dateRemise": "2026-01-15"}
+
+
+# ----- aller-retour export CSV -> /bulk -----
+
+def test_csv_export_round_trips_through_bulk_import():
+    records = [
+        {**EPI_ROW, "dateRemise": date(2026, 1, 15), "dateExpiration": date(2027, 1, 15)},
+        {**EPI_ROW, "id": "e2", "employe": "Bob; \"le chef\"", "dateRemise": date(2025, 3, 1),
+         "dateExpiration": date(2025, 9, 1), "statut": "Hors service"},
+    ]
+    columns = [EXPORT_ID_COLUMN, *EXPORTS["epi"][2]]
+    writer = CsvTableWriter([label for _, label in columns])
+    writer.add_rows(export_rows("epi", columns, records))
+
+    rows = read_csv_rows(io.BytesIO(writer.flush()), bulk_header_map("epi"))
+    items, errors = validate_bulk_rows("epi", rows)
+
+    assert errors == []
+    assert [item.model_dump() for item in items] == [EPI.model_validate(r).model_dump() for r in records]
@@ -0,0 +1,193 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+
+import main
+from main import (
+    alert_horizon, alert_level, alert_total, counter_deltas, counter_keys,
+    rebuild_counters, update_counters_many,
+)
+
+TODAY = date(2026, 10, 18)
+
+
+class FakeCursor:
+    def __init__(self, conn, rows=()):
+        self.conn = conn
+        self.rows = list(rows)
+
+    async def execute(self, query, params=None):
+        self.conn.statements.append((query, params))
+
+    async def executemany(self, query, params):
+        self.conn.inserts.extend(params)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.rows:
+            raise StopAsyncIteration
+        return self.rows.pop(0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    """Enregistre les requêtes ; les curseurs nommés renvoient `tables`."""
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.statements = []
+        self.inserts = []
+
+    async def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def cursor(self, name=None):
+        rows = self.tables.get(name.removeprefix("counters_"), ()) if name else ()
+        return FakeCursor(self, rows)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+# ----- counter_keys -----
+
+def test_counter_keys_counts_total_fields_and_echeance():
+    row = {"statut": "En service", "dateExpiration": date(2026, 11, 30)}
+    assert counter_keys("epi", row) == [
+        ("total", ""), ("statut", "en_service"), ("echeance", "2026-11-30"),
+    ]
+
+
+def test_counter_keys_ignores_column_case():
+    row = {"statut": "en service", "dateexpiration": "2026-11-30"}
+    assert ("echeance", "2026-11-30") in counter_keys("epi", row)
+
+
+def test_counter_keys_skips_inactive_echeance():
+    row = {"statut": "Terminé", "dateEcheance": date(2026, 10, 1)}
+    assert counter_keys("plans", row) == [("total", ""), ("statut", "termine")]
+
+
+def test_counter_keys_skips_missing_dates():
+    assert counter_keys("epi", {"statut": "en_service", "dateExpiration": None}) == [
+        ("total", ""), ("statut", "en_service"),
+    ]
+
+
+def test_counter_keys_buckets_periode_by_month():
+    row = {"statut": "Ouvert", "gravite": "Grave", "type": "Accident", "date": "2026-10-03"}
+    assert counter_keys("incidents", row) == [
+        ("total", ""), ("statut", "ouvert"), ("gravite", "grave"),
+        ("type", "accident"), ("periode", "2026-10"),
+    ]
+
+
+# ----- counter_deltas / update_counters_many -----
+
+def test_counter_deltas_drops_unchanged_buckets():
+    old = {"statut": "en service", "dateExpiration": "2026-11-30"}
+    new = {"statut": "expire", "dateExpiration": "2026-11-30"}
+    assert counter_deltas("epi", [old], [new]) == {
+        ("statut", "en_service"): -1, ("statut", "expire"): 1,
+    }
+
+
+def test_update_counters_many_sends_only_non_zero_deltas():
+    conn = FakeConnection()
+    rows = [{"statut": "en service", "dateExpiration": "2026-11-30"}] * 2
+    asyncio.run(update_counters_many(conn, "epi", [], rows))
+    assert sorted(conn.inserts) == [
+        ("epi", "echeance", "2026-11-30", 2),
+        ("epi", "revision", "", 1),
+        ("epi", "statut", "en_service", 2),
+        ("epi", "total", "", 2),
+    ]
+
+
+def test_update_counters_many_locks_rows_in_key_order():
+    a = {"statut": "A", "dateExpiration": None}
+    b = {"statut": "B", "dateExpiration": None}
+    forward, backward = FakeConnection(), FakeConnection()
+    asyncio.run(update_counters_many(forward, "epi", [a], [b]))
+    asyncio.run(update_counters_many(backward, "epi", [b], [a]))
+    order = [params[1:3] for params in forward.inserts]
+    assert order == sorted(order)
+    assert order == [params[1:3] for params in backward.inserts]
+
+
+def test_update_counters_many_unchanged_row_bumps_revision_only():
+    conn = FakeConnection()
+    row = {"statut": "en service", "dateExpiration": "2026-11-30"}
+    asyncio.run(update_counters_many(conn, "epi", [row], [row]))
+    assert conn.inserts == [("epi", "revision", "", 1)]
+
+
+def test_update_counters_many_without_rows_writes_nothing():
+    conn = FakeConnection()
+    asyncio.run(update_counters_many(conn, "epi", [], []))
+    assert conn.inserts == []
+
+
+# ----- rebuild_counters -----
+
+def test_rebuild_counters_recounts_every_table():
+    conn = FakeConnection({
+        "epi": [
+            {"statut": "en service", "dateExpiration": date(2026, 11, 30)},
+            {"statut": "En service", "dateExpiration": None},
+        ],
+        "plans": [{"statut": "en cours", "dateEcheance": date(2026, 10, 1)}],
+    })
+    asyncio.run(rebuild_counters(conn))
+    assert conn.statements[1][0] == "DELETE FROM dashboard_counters WHERE dimension <> 'revision'"
+    assert conn.statements[2][0] == "UPDATE dashboard_counters SET value = value + 1"
+    inserted = {(m, d, b): n for m, d, b, n in conn.inserts}
+    assert inserted[("epi", "total", "")] == 2
+    assert inserted[("epi", "statut", "en_service")] == 2
+    assert inserted[("epi", "echeance", "2026-11-30")] == 1
+    assert inserted[("plans", "echeance", "2026-10-01")] == 1
+    assert not any(m == "formations" for m, *_ in conn.inserts)
+    epi = [(d, b) for m, d, b, _ in conn.inserts if m == "epi"]
+    assert epi == sorted(epi)
+
+
+# ----- alertes -----
+
+@pytest.mark.parametrize("jours, niveau", [(-30, 0), (-1, 0), (0, 1), (7, 1), (8, 2), (30, 2)])
+def test_alert_level_thresholds(jours, niveau):
+    assert alert_level(jours, (7, 30)) == niveau
+
+
+def test_alert_level_same_day_permit_is_urgent():
+    assert alert_level(0, (0, 0)) == 1
+    assert alert_level(-1, (0, 0)) == 0
+
+
+def test_alert_horizon_stops_at_last_enabled_level():
+    assert alert_horizon(main.ALERTES_ECHEANCE["epi"], TODAY) == date(2026, 11, 17)
+    assert alert_horizon(main.ALERTES_ECHEANCE["plans"], TODAY) == date(2026, 10, 25)
+    assert alert_horizon(main.ALERTES_ECHEANCE["permis"], TODAY) == TODAY
+
+
+def test_alert_total_sums_expired_and_upcoming_buckets():
+    counters = [
+        {"module": "epi", "dimension": "echeance", "bucket": "2019-01-01", "value": 400},
+        {"module": "epi", "dimension": "echeance", "bucket": "2026-11-17", "value": 3},
+        {"module": "epi", "dimension": "echeance", "bucket": "2026-11-18", "value": 5},
+        {"module": "plans", "dimension": "echeance", "bucket": "2026-10-26", "value": 7},
+        {"module": "plans", "dimension": "statut", "bucket": "en_attente", "value": 2},
+        {"module": "plans", "dimension": "statut", "bucket": "en_cours", "value": 9},
+        {"module": "aspects-environnementaux", "dimension": "statut", "bucket": "significatif", "value": 1},
+        {"module": "incidents", "dimension": "statut", "bucket": "en_investigation", "value": 4},
+    ]
+    assert alert_total(counters, TODAY) == 400 + 3 + 2 + 1 + 4
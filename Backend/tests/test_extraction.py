@@ -0,0 +1,26 @@
+from extraction import extract_text
+
+
+def test_extract_text_corrupt_pdf_returns_empty(tmp_path):
+    path = tmp_path / "casse.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + b"\x00\xff" * 64)
+    assert extract_text(str(path), 1000) == ""
+
+
+def test_extract_text_corrupt_docx_returns_empty(tmp_path):
+    path = tmp_path / "casse.docx"
+    path.write_bytes(b"PK\x03\x04" + b"\x00" * 64)
+    assert extract_text(str(path), 1000) == ""
+
+
+def test_extract_text_plain_collapses_whitespace_and_truncates(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("consigne\n  de   securite", encoding="utf-8")
+    assert extract_text(str(path), 1000) == "consigne de securite"
+    assert extract_text(str(path), 8) == "consigne"
+
+
+def test_extract_text_binary_returns_empty(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xe0" + b"\x00" * 64)
+    assert extract_text(str(path), 1000) == ""
@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import QueryParams
+
+import main
+from main import build_list_query, encode_cursor
+
+
+def build(module, params="", sort=None, cursor=None):
+    return build_list_query(module, QueryParams(params), sort, None, cursor)
+
+
+# ----- filtres -----
+
+def test_filters_are_parsed_to_field_types():
+    _, args, _ = build("plans", "avancement=50&avancement=75&dateEcheance_max=2026-12-31")
+    assert args == [[50, 75], date(2026, 12, 31)]
+
+
+@pytest.mark.parametrize("params", [
+    "avancement=abc",
+    "dateExpiration_max=foo",
+    "dateExpiration_min=2026-13-01",
+])
+def test_invalid_filter_value_is_rejected(params):
+    module = "plans" if params.startswith("avancement") else "epi"
+    with pytest.raises(HTTPException) as exc:
+        build(module, params)
+    assert exc.value.status_code == 400
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        build("epi", "couleur=rouge")
+    assert exc.value.status_code == 400
+
+
+def test_search_escapes_like_wildcards():
+    query, args, _ = build("epi", "q=100%_a&q_fields=employe,marque")
+    assert "(employe ILIKE %s OR marque ILIKE %s)" in query
+    assert args == ["%100\\%\\_a%", "%100\\%\\_a%"]
+
+
+# ----- curseur -----
+
+def test_cursor_values_are_parsed_to_field_types():
+    cursor = encode_cursor([date(2026, 11, 30), "b7"])
+    query, args, _ = build("epi", sort="dateExpiration", cursor=cursor)
+    assert "(dateExpiration, id) > (%s, %s)" in query
+    assert args == [date(2026, 11, 30), "b7"]
+
+
+@pytest.mark.parametrize("values", [
+    [{"a": 1}, "b7"],
+    ["pas une date", "b7"],
+    ["2026-11-30", {"id": 1}],
+    [None, "b7"],
+    ["2026-11-30"],
+    {"value": "2026-11-30"},
+])
+def test_invalid_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as exc:
+        build("epi", sort="dateExpiration", cursor=encode_cursor(values))
+    assert exc.value.status_code == 400
+
+
+def test_undecodable_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        build("epi", cursor="!!!")
+    assert exc.value.status_code == 400
+
+
+# ----- curseur sur colonne NULL-able (NULL en fin de croissant, en tête de décroissant) -----
+
+@pytest.fixture
+def nullable_expiration(monkeypatch):
+    monkeypatch.setattr(main, "NULLABLE_COLUMNS", {"epi": {"dateExpiration"}})
+
+
+def test_ascending_page_before_nulls_continues_into_null_block(nullable_expiration):
+    cursor = encode_cursor(["2026-11-30", "b7"])
+    query, args, _ = build("epi", sort="dateExpiration", cursor=cursor)
+    assert "((dateExpiration, id) > (%s, %s) OR dateExpiration IS NULL)" in query
+    assert query.endswith("ORDER BY dateExpiration ASC, id ASC")
+    assert args == [date(2026, 11, 30), "b7"]
+
+
+def test_ascending_page_inside_null_block_stays_in_it(nullable_expiration):
+    query, args, _ = build("epi", sort="dateExpiration", cursor=encode_cursor([None, "b7"]))
+    assert "(dateExpiration IS NULL AND id > %s)" in query
+    assert args == ["b7"]
+
+
+def test_descending_page_inside_null_block_continues_into_values(nullable_expiration):
+    query, args, _ = build("epi", sort="-dateExpiration", cursor=encode_cursor([None, "b7"]))
+    assert "((dateExpiration IS NULL AND id < %s) OR dateExpiration IS NOT NULL)" in query
+    assert query.endswith("ORDER BY dateExpiration DESC, id DESC")
+    assert args == ["b7"]
+
+
+def test_descending_page_after_null_block_skips_it(nullable_expiration):
+    cursor = encode_cursor(["2026-11-30", "b7"])
+    query, args, _ = build("epi", sort="-dateExpiration", cursor=cursor)
+    assert "(dateExpiration, id) < (%s, %s)" in query
+    assert "IS NULL" not in query
+    assert args == [date(2026, 11, 30), "b7"]
+
+
+def test_not_null_column_uses_plain_row_comparison():
+    query, _, _ = build("epi", sort="-dateRemise", cursor=encode_cursor(["2026-01-01", "b7"]))
+    assert "(dateRemise, id) < (%s, %s)" in query
+    assert "IS NULL" not in query
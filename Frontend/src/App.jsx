@@ -44,6 +44,9 @@ const QHSEApp = () => {
   const [showWelcome, setShowWelcome] = useState(true);
   const [activeModule, setActiveModule] = useState('dashboard');
   const [notifications, setNotifications] = useState([]);
+  // Nombre total d'alertes : la liste est limitée aux plus prioritaires
+  const [alertsTotal, setAlertsTotal] = useState(0);
+  const [dashboardSummary, setDashboardSummary] = useState(null);
   const [showNotifications, setShowNotifications] = useState(false);
   const [loading, setLoading] = useState(false);
   const notificationsRef = useRef(null);
@@ -85,321 +88,6 @@ const QHSEApp = () => {
     { id: 'rapports', nom: 'Rapports', icon: FileText }
   ];
 
-  // Fonction pour calculer les jours restants
-  const calcJours = (dateExp) => {
-    if (!dateExp) return 999;
-    try {
-      const dateExpiration = new Date(dateExp);
-      const aujourdHui = new Date();
-      
-      aujourdHui.setHours(0, 0, 0, 0);
-      dateExpiration.setHours(0, 0, 0, 0);
-      
-      const diff = dateExpiration.getTime() - aujourdHui.getTime();
-      const jours = Math.ceil(diff / (1000 * 60 * 60 * 24));
-      
-      return jours;
-    } catch (error) {
-      console.error('Erreur calcul jours:', error, dateExp);
-      return 999;
-    }
-  };
-
-  // Calcul des notifications globales UNIFIÉES pour tous les modules
-  useEffect(() => {
-    const calculateNotifications = () => {
-      const notifs = [];
-      
-      console.log('Calcul des notifications unifiées avec données:', appData);
-
-      // === FORMATIONS ===
-      appData.formations.forEach(f => {
-        const jours = calcJours(f.dateExpiration);
-        
-        if (jours < 0) {
-          notifs.push({ 
-            msg: `FORMATION EXPIRÉE: "${f.intitule}" a expiré il y a ${Math.abs(jours)} jours`, 
-            type: 'formation',
-            priority: 'critical',
-            module: 'formations',
-            date: f.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours <= 7) {
-          notifs.push({ 
-            msg: `FORMATION À RENOUVELER: "${f.intitule}" expire dans ${jours} jours`, 
-            type: 'formation',
-            priority: 'high',
-            module: 'formations',
-            date: f.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (jours <= 30) {
-          notifs.push({ 
-            msg: `FORMATION À PLANIFIER: "${f.intitule}" expire dans ${jours} jours`, 
-            type: 'formation',
-            priority: 'medium',
-            module: 'formations',
-            date: f.dateExpiration,
-            joursRestants: jours,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === MATÉRIEL ===
-      appData.materiel.forEach(m => {
-        const jours = calcJours(m.prochainControle);
-        
-        if (jours < 0) {
-          notifs.push({ 
-            msg: `CONTRÔLE EN RETARD: "${m.designation}" devrait être contrôlé il y a ${Math.abs(jours)} jours`, 
-            type: 'materiel',
-            priority: 'critical',
-            module: 'materiel',
-            date: m.prochainControle,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours <= 7) {
-          notifs.push({ 
-            msg: `CONTRÔLE URGENT: "${m.designation}" à contrôler dans ${jours} jours`, 
-            type: 'materiel',
-            priority: 'high',
-            module: 'materiel',
-            date: m.prochainControle,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (jours <= 30) {
-          notifs.push({ 
-            msg: `CONTRÔLE À PLANIFIER: "${m.designation}" à contrôler dans ${jours} jours`, 
-            type: 'materiel',
-            priority: 'medium',
-            module: 'materiel',
-            date: m.prochainControle,
-            joursRestants: jours,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === VISITES MÉDICALES ===
-      appData.visites.forEach(v => {
-        const jours = calcJours(v.dateExpiration);
-        
-        if (jours < 0) {
-          notifs.push({ 
-            msg: `VISITE EXPIRÉE: "${v.intitule}" a expiré il y a ${Math.abs(jours)} jours`, 
-            type: 'visite',
-            priority: 'critical',
-            module: 'visites',
-            date: v.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours <= 7) {
-          notifs.push({ 
-            msg: `VISITE URGENTE: "${v.intitule}" expire dans ${jours} jours`, 
-            type: 'visite',
-            priority: 'high',
-            module: 'visites',
-            date: v.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (jours <= 30) {
-          notifs.push({ 
-            msg: `VISITE À PLANIFIER: "${v.intitule}" expire dans ${jours} jours`, 
-            type: 'visite',
-            priority: 'medium',
-            module: 'visites',
-            date: v.dateExpiration,
-            joursRestants: jours,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === EPI ===
-      appData.epiList.forEach(e => {
-        const jours = calcJours(e.dateExpiration);
-        
-        if (jours < 0) {
-          notifs.push({ 
-            msg: `EPI EXPIRÉ: "${e.typeEPI}" a expiré il y a ${Math.abs(jours)} jours`, 
-            type: 'epi',
-            priority: 'critical',
-            module: 'epi',
-            date: e.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours <= 7) {
-          notifs.push({ 
-            msg: `EPI À RENOUVELER: "${e.typeEPI}" expire dans ${jours} jours`, 
-            type: 'epi',
-            priority: 'high',
-            module: 'epi',
-            date: e.dateExpiration,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (jours <= 30) {
-          notifs.push({ 
-            msg: `EPI À COMMANDER: "${e.typeEPI}" expire dans ${jours} jours`, 
-            type: 'epi',
-            priority: 'medium',
-            module: 'epi',
-            date: e.dateExpiration,
-            joursRestants: jours,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === PLANS D'ACTION ===
-      appData.plans.forEach(p => {
-        const jours = calcJours(p.dateEcheance);
-        const statut = p.statut?.toLowerCase();
-        
-        if (jours < 0 && (statut === 'en cours' || statut === 'en_cours')) {
-          notifs.push({ 
-            msg: `PLAN EN RETARD: "${p.titre}" est en retard de ${Math.abs(jours)} jours`, 
-            type: 'plan',
-            priority: 'critical',
-            module: 'plans',
-            date: p.dateEcheance,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours <= 7 && (statut === 'en cours' || statut === 'en_cours')) {
-          notifs.push({ 
-            msg: `PLAN À FINALISER: "${p.titre}" échéance dans ${jours} jours`, 
-            type: 'plan',
-            priority: 'high',
-            module: 'plans',
-            date: p.dateEcheance,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (statut === 'en attente' || statut === 'en_attente') {
-          notifs.push({ 
-            msg: `PLAN EN ATTENTE: "${p.titre}" nécessite une action`, 
-            type: 'plan',
-            priority: 'medium',
-            module: 'plans',
-            date: p.dateCreation,
-            joursRestants: 999,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === PERMIS DE TRAVAIL ===
-      appData.permisTravail.forEach(p => {
-        const jours = calcJours(p.dateFin);
-        const statut = p.statut?.toLowerCase();
-        
-        if (jours < 0 && (statut === 'approuvé' || statut === 'approuve' || statut === 'en cours' || statut === 'en_cours')) {
-          notifs.push({ 
-            msg: `PERMIS EXPIRÉ: "${p.numero}" a expiré il y a ${Math.abs(jours)} jours`, 
-            type: 'permis',
-            priority: 'critical',
-            module: 'permis',
-            date: p.dateFin,
-            joursRestants: jours,
-            icon: 'AlertCircle'
-          });
-        } else if (jours === 0 && (statut === 'approuvé' || statut === 'approuve' || statut === 'en cours' || statut === 'en_cours')) {
-          notifs.push({ 
-            msg: `PERMIS EXPIRE AUJOURD'HUI: "${p.numero}"`, 
-            type: 'permis',
-            priority: 'high',
-            module: 'permis',
-            date: p.dateFin,
-            joursRestants: jours,
-            icon: 'AlertTriangle'
-          });
-        } else if (statut === 'en attente' || statut === 'en_attente') {
-          notifs.push({ 
-            msg: `PERMIS EN ATTENTE: "${p.numero}" nécessite approbation`, 
-            type: 'permis',
-            priority: 'medium',
-            module: 'permis',
-            date: p.dateDebut,
-            joursRestants: 999,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === INCIDENTS NON CLÔTURÉS ===
-      appData.incidents.forEach(i => {
-        const statut = i.statut?.toLowerCase();
-        if (statut === 'en cours' || statut === 'en_cours' || statut === 'en investigation' || statut === 'en_investigation') {
-          notifs.push({ 
-            msg: `INCIDENT NON RÉSOLU: "${i.titre}" nécessite suivi`, 
-            type: 'incident',
-            priority: 'medium',
-            module: 'incidents',
-            date: i.date,
-            joursRestants: 999,
-            icon: 'AlertTriangle'
-          });
-        }
-      });
-
-      // === PLANS DE FORMATION EN ATTENTE ===
-      appData.planformations.forEach(pf => {
-        const statut = pf.statut?.toLowerCase();
-        if (statut === 'en attente' || statut === 'en_attente') {
-          notifs.push({ 
-            msg: `PLAN FORMATION EN ATTENTE: "${pf.intitule}" nécessite validation`, 
-            type: 'planformation',
-            priority: 'medium',
-            module: 'planformations',
-            date: pf.dateCreation,
-            joursRestants: 999,
-            icon: 'Clock'
-          });
-        }
-      });
-
-      // === ASPECTS ENVIRONNEMENTAUX SIGNIFICATIFS ===
-      appData.aspectsEnvironnementaux.forEach(ae => {
-        const statut = ae.statut?.toLowerCase();
-        if (statut === 'significatif') {
-          notifs.push({ 
-            msg: `ASPECT ENVIRONNEMENTAL SIGNIFICATIF: "${ae.aspect}" nécessite attention`, 
-            type: 'environnement',
-            priority: 'high',
-            module: 'gestionenvironnementale',
-            date: ae.date_derniere_mesure,
-            joursRestants: 999,
-            icon: 'AlertTriangle'
-          });
-        }
-      });
-
-      // Trier par priorité (critical > high > medium > low) et par date
-      const priorityOrder = { critical: 1, high: 2, medium: 3, low: 4 };
-      notifs.sort((a, b) => {
-        if (priorityOrder[a.priority] !== priorityOrder[b.priority]) {
-          return priorityOrder[a.priority] - priorityOrder[b.priority];
-        }
-        return a.joursRestants - b.joursRestants;
-      });
-      
-      console.log('Notifications unifiées générées:', notifs);
-      setNotifications(notifs);
-    };
-
-    calculateNotifications();
-  }, [appData]);
-
   // Fermer les notifications en cliquant à l'extérieur
   useEffect(() => {
     const handleClickOutside = (event) => {
@@ -436,7 +124,7 @@ const QHSEApp = () => {
         <div className="flex items-center justify-between">
           <h3 className="font-bold text-sm">Alertes QHSE - Tous Modules</h3>
           <span className="bg-white text-blue-600 px-2 py-1 rounded-full text-xs font-bold">
-            {notifications.length}
+            {alertsTotal}
           </span>
         </div>
         <p className="text-blue-100 text-xs mt-1">
@@ -522,47 +210,84 @@ const QHSEApp = () => {
   );
 
   // Calcul des alertes globales (pour le badge)
-  const globalAlerts = notifications.length;
+  const globalAlerts = alertsTotal;
+
+  // Correspondance module API -> clé de appData
+  const moduleKeys = {
+    'formations': 'formations',
+    'materiel': 'materiel',
+    'visites': 'visites',
+    'plans': 'plans',
+    'epi': 'epiList',
+    'incidents': 'incidents',
+    'permis': 'permisTravail',
+    'ged': 'ged',
+    'planformations': 'planformations',
+    'planninghse': 'planninghse',
+    'veillereglementaire': 'veillereglementaire',
+    'aspects-environnementaux': 'aspectsEnvironnementaux'
+  };
 
-  // Fonction pour charger les données depuis l'API
+  // État de synchronisation : version serveur et ETag de chaque module
+  const syncState = useRef({ version: null, etags: {} });
+
+  // Fonction pour charger les données depuis l'API : un seul appel /api/bootstrap,
+  // puis uniquement les lignes modifiées/supprimées depuis la dernière version
   const fetchData = async () => {
     setLoading(true);
     try {
-      const endpoints = [
-        'formations', 'materiel', 'visites', 'plans', 'epi', 
-        'incidents', 'permis', 'ged', 'planformations', 'planninghse',
-        'veillereglementaire', 'aspects-environnementaux'
-      ];
-
-      const promises = endpoints.map(endpoint =>
-        fetch(`${API_URL}/api/${endpoint}`)
-          .then(response => {
-            if (!response.ok) throw new Error(`Erreur ${response.status}`);
-            return response.json();
-          })
-          .catch(error => {
-            console.error(`Erreur lors du chargement des ${endpoint}:`, error);
-            return [];
-          })
-      );
-
-      const results = await Promise.all(promises);
-      
-      setAppData(prev => ({
-        ...prev,
-        formations: results[0],
-        materiel: results[1],
-        visites: results[2],
-        plans: results[3],
-        epiList: results[4],
-        incidents: results[5],
-        permisTravail: results[6],
-        ged: results[7],
-        planformations: results[8],
-        planninghse: results[9],
-        veillereglementaire: results[10],
-        aspectsEnvironnementaux: results[11]
-      }));
+      const { version, etags } = syncState.current;
+      const headers = {};
+      if (Object.keys(etags).length > 0) {
+        headers['If-None-Match'] = Object.values(etags).join(', ');
+      }
+      const bootstrapPromise = fetch(
+        `${API_URL}/api/bootstrap${version !== null ? `?since=${version}` : ''}`,
+        { headers }
+      ).then(response => {
+        if (response.status === 304) return null;
+        if (!response.ok) throw new Error(`Erreur ${response.status}`);
+        return response.json();
+      });
+
+      // KPIs et alertes précalculés côté serveur
+      const summaryPromise = fetch(`${API_URL}/api/dashboard/summary`)
+        .then(response => (response.ok ? response.json() : null))
+        .catch(() => null);
+      const alertsPromise = fetch(`${API_URL}/api/alerts`)
+        .then(response => (response.ok ? response.json() : { total: 0, notifications: [] }))
+        .catch(() => ({ total: 0, notifications: [] }));
+
+      const [bootstrap, summary, alerts] = await Promise.all([
+        bootstrapPromise, summaryPromise, alertsPromise
+      ]);
+      setDashboardSummary(summary);
+      setNotifications(alerts.notifications);
+      setAlertsTotal(alerts.total);
+
+      if (!bootstrap) return;
+
+      setAppData(prev => {
+        const next = { ...prev };
+        Object.entries(bootstrap.modules).forEach(([module, delta]) => {
+          const key = moduleKeys[module];
+          if (!key || delta.unchanged) return;
+          if (delta.full) {
+            next[key] = delta.rows;
+            return;
+          }
+          const changed = new Set([...delta.deleted, ...delta.rows.map(row => row.id)]);
+          next[key] = [...prev[key].filter(row => !changed.has(row.id)), ...delta.rows];
+        });
+        return next;
+      });
+
+      syncState.current = {
+        version: bootstrap.version,
+        etags: Object.fromEntries(
+          Object.entries(bootstrap.modules).map(([module, delta]) => [module, delta.etag])
+        )
+      };
     } catch (error) {
       console.error('Erreur lors du chargement des données:', error);
     } finally {
@@ -708,6 +433,7 @@ const QHSEApp = () => {
             onRefresh={fetchData}
             loading={loading}
             notifications={notifications}
+            summary={dashboardSummary}
           />
         );
       
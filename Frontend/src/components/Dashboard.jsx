@@ -22,7 +22,8 @@ const Dashboard = ({
   gestionenvironnementale = [],
   onShowModal,
   onRefresh,
-  notifications = []
+  notifications = [],
+  summary = null
 }) => {
   const [selectedPeriod, setSelectedPeriod] = useState('month');
   const [loading, setLoading] = useState(false);
@@ -53,8 +54,8 @@ const Dashboard = ({
     }
   };
 
-  // Calcul des statistiques
-  const stats = {
+  // Calcul des statistiques (précalculées par /api/dashboard/summary si disponible)
+  const stats = summary || {
     // Modules existants
     formationsExpirant: formations.filter(f => {
       const jours = calcJours(f.dateExpiration);
@@ -261,8 +262,10 @@ const Dashboard = ({
     return Math.round((conformAspects / totalAspects) * 100);
   };
 
-  const conformityRate = calculateConformityRate();
-  const environmentalConformityRate = calculateEnvironmentalConformityRate();
+  const conformityRate = summary ? summary.tauxConformite : calculateConformityRate();
+  const environmentalConformityRate = summary
+    ? summary.tauxConformiteEnvironnementale
+    : calculateEnvironmentalConformityRate();
   const hseActivityIndex = stats.activitesHSECeMois;
 
   // Composant Carte de Statistique avec animations
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Shield, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer, echeanceFilters } from '../utils/exportUtils';
 
 const EPI = ({ onRefresh, onDataUpdate }) => {
   const [epiList, setEpiList] = useState([]);
@@ -127,29 +127,17 @@ const EPI = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredEPI();
-    if (format === 'pdf') {
-      const columns = ['Employé', 'Département', 'Type EPI', 'Marque', 'Taille', 'Date Remise', 'Date Expiration', 'Statut'];
-      const data = filteredData.map(e => [
-        e.employe, e.departement, e.typeEPI, e.marque, e.taille,
-        new Date(e.dateRemise).toLocaleDateString('fr-FR'),
-        new Date(e.dateExpiration).toLocaleDateString('fr-FR'),
-        getStatusText(calcJours(e.dateExpiration), e.statut)
-      ]);
-      exportToPDF('Liste des EPI', columns, data, 'epi');
-    } else {
-      const excelData = filteredData.map(e => ({
-        'Employé': e.employe,
-        'Département': e.departement,
-        'Type EPI': e.typeEPI,
-        'Marque': e.marque,
-        'Taille': e.taille,
-        'Date Remise': new Date(e.dateRemise).toLocaleDateString('fr-FR'),
-        'Date Expiration': new Date(e.dateExpiration).toLocaleDateString('fr-FR'),
-        'Statut': getStatusText(calcJours(e.dateExpiration), e.statut)
-      }));
-      exportToExcel(excelData, 'epi');
-    }
+    // Mêmes critères que la liste : statuts calculés -> bornes sur l'échéance
+    const { statut, ...champs } = filters;
+    const etats = { en_service: 'valide', bientot_expire: 'bientot', expire: 'expire' };
+    exportFromServer('epi', format, {
+      ...champs,
+      ...(etats[statut]
+        ? { statut: 'En service', ...echeanceFilters('dateExpiration', etats[statut]) }
+        : { statut }),
+      q: searchTerm,
+      q_fields: 'employe,typeEPI,marque'
+    });
   };
 
   const getFilteredEPI = () => {
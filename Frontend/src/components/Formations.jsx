@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Calendar, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer, echeanceFilters } from '../utils/exportUtils';
 
 const Formations = ({ onRefresh, onDataUpdate }) => {
   const [formations, setFormations] = useState([]);
@@ -120,30 +120,15 @@ const Formations = ({ onRefresh, onDataUpdate }) => {
 
   // Export des données
   const handleExport = (format) => {
-    const filteredData = getFilteredFormations();
-    if (format === 'pdf') {
-      const columns = ['Nom', 'Prénom', 'Département', 'Fonction', 'Type Formation', 'Intitulé', 'Centre Formation', 'Date Formation', 'Date Expiration'];
-      const data = filteredData.map(f => [
-        f.nom, f.prenom, f.departement, f.fonction, f.typeFormation, f.intitule, f.centreFormation, 
-        new Date(f.dateFormation).toLocaleDateString('fr-FR'),
-        new Date(f.dateExpiration).toLocaleDateString('fr-FR')
-      ]);
-      exportToPDF('Liste des Formations', columns, data, 'formations');
-    } else {
-      const excelData = filteredData.map(f => ({
-        'Nom': f.nom,
-        'Prénom': f.prenom,
-        'Département': f.departement,
-        'Fonction': f.fonction,
-        'Type Formation': f.typeFormation,
-        'Intitulé': f.intitule,
-        'Centre Formation': f.centreFormation,
-        'Date Formation': new Date(f.dateFormation).toLocaleDateString('fr-FR'),
-        'Date Expiration': new Date(f.dateExpiration).toLocaleDateString('fr-FR'),
-        'Jours restants': calcJours(f.dateExpiration)
-      }));
-      exportToExcel(excelData, 'formations');
-    }
+    // Mêmes critères que la liste : statuts calculés -> bornes sur l'échéance
+    const { statut, ...champs } = filters;
+    const etats = { valide: 'valide', expirant: 'bientot', expire: 'expire' };
+    exportFromServer('formations', format, {
+      ...champs,
+      ...echeanceFilters('dateExpiration', etats[statut]),
+      q: searchTerm,
+      q_fields: 'nom,prenom,intitule'
+    });
   };
 
   // Filtrage avancé
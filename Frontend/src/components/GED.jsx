@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { FileText, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, Eye, Upload } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const GED = ({ onRefresh, onDataUpdate }) => {
   const [documents, setDocuments] = useState([]);
@@ -171,29 +171,7 @@ const GED = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredDocuments();
-    if (format === 'pdf') {
-      const columns = ['Titre', 'Type', 'Catégorie', 'Auteur', 'Date Création', 'Statut'];
-      const data = filteredData.map(d => [
-        d.titre, d.type, d.categorie, d.auteur,
-        new Date(d.dateCreation).toLocaleDateString('fr-FR'),
-        d.statut
-      ]);
-      exportToPDF('Liste des Documents GED', columns, data, 'ged-documents');
-    } else {
-      const excelData = filteredData.map(d => ({
-        'Titre': d.titre,
-        'Type': d.type,
-        'Catégorie': d.categorie,
-        'Description': d.description,
-        'Date Création': new Date(d.dateCreation).toLocaleDateString('fr-FR'),
-        'Date Modification': new Date(d.dateModification).toLocaleDateString('fr-FR'),
-        'Auteur': d.auteur,
-        'Statut': d.statut,
-        'Fichier': d.fichier
-      }));
-      exportToExcel(excelData, 'ged-documents');
-    }
+    exportFromServer('ged', format, { ...filters, q: searchTerm, q_fields: 'titre,description,auteur' });
   };
 
   const getFilteredDocuments = () => {
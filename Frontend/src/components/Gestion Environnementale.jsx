@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Leaf, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText, TrendingUp, AlertTriangle, Target, BarChart3 } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const GestionEnvironnementale = ({ data, onRefresh, onDataUpdate, onDeleteData, loading }) => {
   const [aspects, setAspects] = useState([]);
@@ -195,40 +195,7 @@ const GestionEnvironnementale = ({ data, onRefresh, onDataUpdate, onDeleteData,
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredAspects();
-    if (format === 'pdf') {
-      const columns = ['Aspect', 'Type', 'Catégorie', 'Statut', 'Criticité', 'Indicateur', 'Cible', 'Conformité'];
-      const data = filteredData.map(i => [
-        i.aspect, i.type, i.categorie, i.statut, i.criticite, i.indicateur, i.cible, i.conformite_reglementaire
-      ]);
-      exportToPDF('Registre Environnemental', columns, data, 'registre-environnemental');
-    } else {
-      const excelData = filteredData.map(i => ({
-        'Aspect': i.aspect,
-        'Type': i.type,
-        'Catégorie': i.categorie,
-        'Activité Source': i.activite_source,
-        'Localisation': i.localisation,
-        'Description': i.description,
-        'Condition': i.condition_fonctionnement,
-        'Impact': i.impact_environnemental,
-        'Criticité': i.criticite,
-        'Statut': i.statut,
-        'Indicateur': i.indicateur,
-        'Unité': i.unite_mesure,
-        'Méthode Suivi': i.methode_suivi,
-        'Fréquence': i.frequence_mesure,
-        'Cible': i.cible,
-        'Objectif': i.objectif,
-        'Données Mesurées': i.donnees_mesurees,
-        'Dernière Mesure': i.date_derniere_mesure,
-        'Responsable': i.responsable,
-        'Mesures Maîtrise': i.mesures_maitrise,
-        'Plan Actions': i.plan_actions,
-        'Conformité': i.conformite_reglementaire
-      }));
-      exportToExcel(excelData, 'registre-environnemental');
-    }
+    exportFromServer('aspects-environnementaux', format, { ...filters, q: searchTerm, q_fields: 'aspect,activite_source,localisation,indicateur' });
   };
 
   const getFilteredAspects = () => {
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { AlertTriangle, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const Incidents = ({ onRefresh, onDataUpdate }) => {
   const [incidents, setIncidents] = useState([]);
@@ -137,30 +137,7 @@ const Incidents = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredIncidents();
-    if (format === 'pdf') {
-      const columns = ['Type', 'Type Incident', 'Gravité', 'Date', 'Heure', 'Lieu', 'Personne', 'Statut'];
-      const data = filteredData.map(i => [
-        i.type, i.typeIncident, i.gravite,
-        new Date(i.date).toLocaleDateString('fr-FR'), i.heure, i.lieu, i.personne, i.statut
-      ]);
-      exportToPDF('Liste des Incidents', columns, data, 'incidents');
-    } else {
-      const excelData = filteredData.map(i => ({
-        'Type': i.type,
-        'Type Incident': i.typeIncident,
-        'Gravité': i.gravite,
-        'Date': new Date(i.date).toLocaleDateString('fr-FR'),
-        'Heure': i.heure,
-        'Lieu': i.lieu,
-        'Description': i.description,
-        'Personne': i.personne,
-        'Témoin': i.temoin,
-        'Action': i.action,
-        'Statut': i.statut
-      }));
-      exportToExcel(excelData, 'incidents');
-    }
+    exportFromServer('incidents', format, { ...filters, q: searchTerm, q_fields: 'type,lieu,personne,description' });
   };
 
   const getFilteredIncidents = () => {
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Wrench, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer, echeanceFilters } from '../utils/exportUtils';
 
 const Materiel = ({ onRefresh, onDataUpdate }) => {
   const [materiel, setMateriel] = useState([]);
@@ -130,28 +130,17 @@ const Materiel = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredMateriel();
-    if (format === 'pdf') {
-      const columns = ['Catégorie', 'Désignation', 'N° Série', 'Caractéristiques', 'Dernier Contrôle', 'Prochain Contrôle', 'Statut'];
-      const data = filteredData.map(m => [
-        m.categorie, m.designation, m.numeroSerie, m.caracteristiques,
-        new Date(m.dateControle).toLocaleDateString('fr-FR'),
-        new Date(m.prochainControle).toLocaleDateString('fr-FR'),
-        getStatusText(calcJours(m.prochainControle), m.statut)
-      ]);
-      exportToPDF('Liste du Matériel', columns, data, 'materiel');
-    } else {
-      const excelData = filteredData.map(m => ({
-        'Catégorie': m.categorie,
-        'Désignation': m.designation,
-        'N° Série': m.numeroSerie,
-        'Caractéristiques': m.caracteristiques,
-        'Date Contrôle': new Date(m.dateControle).toLocaleDateString('fr-FR'),
-        'Prochain Contrôle': new Date(m.prochainControle).toLocaleDateString('fr-FR'),
-        'Statut': m.statut
-      }));
-      exportToExcel(excelData, 'materiel');
-    }
+    // Mêmes critères que la liste : statuts calculés -> bornes sur l'échéance
+    const { statut, ...champs } = filters;
+    const etats = { conforme: 'valide', bientot_controle: 'bientot', a_controler: 'expire' };
+    exportFromServer('materiel', format, {
+      ...champs,
+      ...(etats[statut]
+        ? { statut: 'Conforme', ...echeanceFilters('prochainControle', etats[statut]) }
+        : { statut }),
+      q: searchTerm,
+      q_fields: 'designation,numeroSerie,categorie,caracteristiques'
+    });
   };
 
   const getFilteredMateriel = () => {
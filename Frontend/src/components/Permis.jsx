@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { HardHat, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText, User, MapPin } from 'lucide-react';
-import { exportToPDF, exportToExcel, formatPermisData } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const Permis = ({ data, onRefresh, onDataUpdate, onDeleteData, loading }) => {
   const [permis, setPermis] = useState([]);
@@ -183,19 +183,7 @@ const Permis = ({ data, onRefresh, onDataUpdate, onDeleteData, loading }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredPermis();
-    if (format === 'pdf') {
-      const columns = ['N° Permis', 'Type Travail', 'Localisation', 'Demandeur', 'Exécutant', 'Département', 'Date Début', 'Date Fin', 'Statut'];
-      const data = filteredData.map(p => [
-        p.numero, p.typeTravail, p.localisation, p.demandeur, p.executant, p.departement,
-        new Date(p.dateDebut).toLocaleDateString('fr-FR'),
-        new Date(p.dateFin).toLocaleDateString('fr-FR'),
-        p.statut
-      ]);
-      exportToPDF('Liste des Permis de Travail', columns, data, 'permis');
-    } else {
-      exportToExcel(formatPermisData(filteredData), 'permis');
-    }
+    exportFromServer('permis', format, { ...filters, q: searchTerm, q_fields: 'numero,typeTravail,demandeur,localisation' });
   };
 
   const getFilteredPermis = () => {
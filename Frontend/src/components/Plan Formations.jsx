@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Calendar, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText, Users } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const PlanFormations = ({ onRefresh, onDataUpdate }) => {
   const [plans, setPlans] = useState([]);
@@ -138,32 +138,7 @@ const PlanFormations = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredPlans();
-    if (format === 'pdf') {
-      const columns = ['Intitulé', 'Type', 'Public Cible', 'Formateur', 'Durée', 'Lieu', 'Coût', 'Période', 'Statut'];
-      const data = filteredData.map(p => [
-        p.intitule, p.typeFormation, p.publicCible, p.formateur, p.duree, p.lieu,
-        `${p.cout} €`, 
-        `${new Date(p.dateDebut).toLocaleDateString('fr-FR')} - ${new Date(p.dateFin).toLocaleDateString('fr-FR')}`,
-        p.statut
-      ]);
-      exportToPDF('Plan de Formations', columns, data, 'plan-formations');
-    } else {
-      const excelData = filteredData.map(p => ({
-        'Intitulé': p.intitule,
-        'Type Formation': p.typeFormation,
-        'Description': p.description,
-        'Public Cible': p.publicCible,
-        'Formateur': p.formateur,
-        'Date Début': new Date(p.dateDebut).toLocaleDateString('fr-FR'),
-        'Date Fin': new Date(p.dateFin).toLocaleDateString('fr-FR'),
-        'Durée': p.duree,
-        'Lieu': p.lieu,
-        'Coût (€)': p.cout,
-        'Statut': p.statut
-      }));
-      exportToExcel(excelData, 'plan-formations');
-    }
+    exportFromServer('planformations', format, { ...filters, q: searchTerm, q_fields: 'intitule,formateur,description' });
   };
 
   const getFilteredPlans = () => {
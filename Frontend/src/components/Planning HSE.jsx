@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Calendar, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText, Activity, ClipboardCheck, Megaphone } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const PlanningHSE = ({ onRefresh, onDataUpdate }) => {
   const [activites, setActivites] = useState([]);
@@ -157,31 +157,7 @@ const PlanningHSE = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredActivites();
-    if (format === 'pdf') {
-      const columns = ['Titre', 'Type', 'Dates', 'Lieu', 'Responsable', 'Priorité', 'Statut'];
-      const data = filteredData.map(a => [
-        a.titre, a.typeActivite, 
-        `${new Date(a.dateDebut).toLocaleDateString('fr-FR')} ${a.heureDebut || ''}`,
-        a.lieu, a.responsable, a.priorite, a.statut
-      ]);
-      exportToPDF('Planning des Activités HSE', columns, data, 'planning-hse');
-    } else {
-      const excelData = filteredData.map(a => ({
-        'Titre': a.titre,
-        'Type Activité': a.typeActivite,
-        'Description': a.description,
-        'Date Début': new Date(a.dateDebut).toLocaleDateString('fr-FR'),
-        'Date Fin': new Date(a.dateFin).toLocaleDateString('fr-FR'),
-        'Heure Début': a.heureDebut,
-        'Heure Fin': a.heureFin,
-        'Lieu': a.lieu,
-        'Responsable': a.responsable,
-        'Priorité': a.priorite,
-        'Statut': a.statut
-      }));
-      exportToExcel(excelData, 'planning-hse');
-    }
+    exportFromServer('planninghse', format, { ...filters, q: searchTerm, q_fields: 'titre,responsable,lieu,description' });
   };
 
   const getFilteredActivites = () => {
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { ClipboardList, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const Plans = ({ onRefresh, onDataUpdate }) => {
   const [plans, setPlans] = useState([]);
@@ -163,33 +163,7 @@ const Plans = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredPlans();
-    if (format === 'pdf') {
-      const columns = ['Titre', 'Responsable', 'Département', 'Date Début', 'Date Échéance', 'Priorité', 'Avancement', 'Statut', 'Processus'];
-      const data = filteredData.map(p => [
-        p.titre, p.responsable, p.departement,
-        new Date(p.dateDebut).toLocaleDateString('fr-FR'),
-        new Date(p.dateEcheance).toLocaleDateString('fr-FR'),
-        p.priorite, `${p.avancement}%`, p.statut, p.processus
-      ]);
-      exportToPDF('Liste des Plans d\'Action', columns, data, 'plans-action');
-    } else {
-      const excelData = filteredData.map(p => ({
-        'Titre': p.titre,
-        'Description': p.description,
-        'Responsable': p.responsable,
-        'Département': p.departement,
-        'Date Début': new Date(p.dateDebut).toLocaleDateString('fr-FR'),
-        'Date Échéance': new Date(p.dateEcheance).toLocaleDateString('fr-FR'),
-        'Priorité': p.priorite,
-        'Avancement': `${p.avancement}%`,
-        'Statut': p.statut,
-        'Processus': p.processus,
-        'Mesure Efficacité': p.mesureEfficacite,
-        'Commentaire': p.commentaire
-      }));
-      exportToExcel(excelData, 'plans-action');
-    }
+    exportFromServer('plans', format, { ...filters, q: searchTerm, q_fields: 'titre,responsable,departement,description' });
   };
 
   const getFilteredPlans = () => {
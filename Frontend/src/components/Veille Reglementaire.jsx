@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Scale, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText, AlertTriangle, CheckCircle } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer } from '../utils/exportUtils';
 
 const VeilleReglementaire = ({ onRefresh, onDataUpdate }) => {
   const [reglementations, setReglementations] = useState([]);
@@ -127,30 +127,7 @@ const VeilleReglementaire = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredReglementations();
-    if (format === 'pdf') {
-      const columns = ['Référence', 'Titre', 'Type', 'Organisme', 'Date Publication', 'Date Application', 'Statut', 'Impact'];
-      const data = filteredData.map(r => [
-        r.reference, r.titre, r.typeReglementation, r.organisme,
-        new Date(r.datePublication).toLocaleDateString('fr-FR'),
-        new Date(r.dateApplication).toLocaleDateString('fr-FR'),
-        r.statut, r.impact
-      ]);
-      exportToPDF('Veille Réglementaire', columns, data, 'veille-reglementaire');
-    } else {
-      const excelData = filteredData.map(r => ({
-        'Référence': r.reference,
-        'Titre': r.titre,
-        'Type': r.typeReglementation,
-        'Organisme': r.organisme,
-        'Date Publication': new Date(r.datePublication).toLocaleDateString('fr-FR'),
-        'Date Application': new Date(r.dateApplication).toLocaleDateString('fr-FR'),
-        'Statut': r.statut,
-        'Impact': r.impact,
-        'Description': r.description
-      }));
-      exportToExcel(excelData, 'veille-reglementaire');
-    }
+    exportFromServer('veillereglementaire', format, { ...filters, q: searchTerm, q_fields: 'titre,reference,organisme,typeReglementation' });
   };
 
   const getFilteredReglementations = () => {
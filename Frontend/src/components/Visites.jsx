@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Heart, Plus, Edit2, Trash2, X, Save, Search, Download, Filter, FileText } from 'lucide-react';
-import { exportToPDF, exportToExcel } from '../utils/exportUtils';
+import { exportFromServer, echeanceFilters } from '../utils/exportUtils';
 
 const Visites = ({ onRefresh, onDataUpdate }) => {
   const [visites, setVisites] = useState([]);
@@ -125,31 +125,15 @@ const Visites = ({ onRefresh, onDataUpdate }) => {
   };
 
   const handleExport = (format) => {
-    const filteredData = getFilteredVisites();
-    if (format === 'pdf') {
-      const columns = ['Nom', 'Prénom', 'Département', 'Fonction', 'Type Visite', 'Intitulé', 'Centre Médical', 'Date Visite', 'Date Expiration', 'Statut'];
-      const data = filteredData.map(v => [
-        v.nom, v.prenom, v.departement, v.fonction, v.typeVisite, v.intitule, v.centreMedical,
-        new Date(v.dateVisite).toLocaleDateString('fr-FR'),
-        new Date(v.dateExpiration).toLocaleDateString('fr-FR'),
-        getStatusText(calcJours(v.dateExpiration))
-      ]);
-      exportToPDF('Liste des Visites Médicales', columns, data, 'visites');
-    } else {
-      const excelData = filteredData.map(v => ({
-        'Nom': v.nom,
-        'Prénom': v.prenom,
-        'Département': v.departement,
-        'Fonction': v.fonction,
-        'Type Visite': v.typeVisite,
-        'Intitulé': v.intitule,
-        'Centre Médical': v.centreMedical,
-        'Date Visite': new Date(v.dateVisite).toLocaleDateString('fr-FR'),
-        'Date Expiration': new Date(v.dateExpiration).toLocaleDateString('fr-FR'),
-        'Statut': getStatusText(calcJours(v.dateExpiration))
-      }));
-      exportToExcel(excelData, 'visites');
-    }
+    // Mêmes critères que la liste : statuts calculés -> bornes sur l'échéance
+    const { statut, ...champs } = filters;
+    const etats = { valide: 'valide', bientot_expire: 'bientot', expire: 'expire' };
+    exportFromServer('visites', format, {
+      ...champs,
+      ...echeanceFilters('dateExpiration', etats[statut]),
+      q: searchTerm,
+      q_fields: 'nom,prenom,intitule,centreMedical'
+    });
   };
 
   const getFilteredVisites = () => {
@@ -1,6 +1,35 @@
 import { jsPDF } from 'jspdf';
 import 'jspdf-autotable';
 import * as XLSX from 'xlsx';
+import config from '../config';
+
+// Export généré et diffusé par l'API (/api/{module}/export) : le navigateur
+// ne charge ni ne met en forme les lignes.
+// format : 'csv', 'excel' / 'xlsx' ou 'pdf'
+// filters : mêmes filtres que la liste, ex. { departement: 'RH', dateExpiration_max: '2026-12-31' },
+// plus q / q_fields pour la recherche texte ; les valeurs vides sont ignorées.
+export const exportFromServer = (module, format = 'csv', filters = {}) => {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value !== '' && value !== null && value !== undefined) params.append(key, value);
+  });
+  params.append('format', format === 'excel' ? 'xlsx' : format);
+  window.location.href = `${config.API_URL}/api/${module}/export?${params}`;
+};
+
+const dateInDays = (days) => {
+  const date = new Date();
+  date.setDate(date.getDate() + days);
+  return date.toISOString().split('T')[0];
+};
+
+// Bornes de date équivalentes aux filtres « jours restants » des listes :
+// 'expire' (échéance dépassée), 'bientot' (sous 30 jours), 'valide' (au-delà)
+export const echeanceFilters = (field, etat) => ({
+  expire: { [`${field}_max`]: dateInDays(-1) },
+  bientot: { [`${field}_min`]: dateInDays(1), [`${field}_max`]: dateInDays(30) },
+  valide: { [`${field}_min`]: dateInDays(31) }
+}[etat] || {});
 
 // Export PDF
 export const exportToPDF = (title, columns, data, fileName) => {
@@ -36,108 +65,3 @@ export const exportToExcel = (data, fileName, sheetName = 'Sheet1') => {
   XLSX.utils.book_append_sheet(workbook, worksheet, sheetName);
   XLSX.writeFile(workbook, `${fileName}_${new Date().toISOString().split('T')[0]}.xlsx`);
 };
-
-// Formateurs de données pour chaque module
-export const formatFormationsData = (formations) => {
-  return formations.map(formation => ({
-    'Nom': formation.nom,
-    'Prénom': formation.prenom,
-    'Département': formation.departement,
-    'Fonction': formation.fonction,
-    'Type Formation': formation.typeFormation,
-    'Intitulé': formation.intitule,
-    'Centre Formation': formation.centreFormation,
-    'Date Formation': formation.dateFormation,
-    'Date Expiration': formation.dateExpiration
-  }));
-};
-
-export const formatIncidentsData = (incidents) => {
-  return incidents.map(incident => ({
-    'Type': incident.type,
-    'Type Incident': incident.typeIncident,
-    'Gravité': incident.gravite,
-    'Date': incident.date,
-    'Heure': incident.heure,
-    'Lieu': incident.lieu,
-    'Description': incident.description,
-    'Personne': incident.personne,
-    'Témoin': incident.temoin,
-    'Action': incident.action,
-    'Statut': incident.statut
-  }));
-};
-
-export const formatMaterielData = (materiel) => {
-  return materiel.map(item => ({
-    'Catégorie': item.categorie,
-    'Désignation': item.designation,
-    'N° Série': item.numeroSerie,
-    'Caractéristiques': item.caracteristiques,
-    'Date Contrôle': item.dateControle,
-    'Prochain Contrôle': item.prochainControle,
-    'Statut': item.statut
-  }));
-};
-
-export const formatVisitesData = (visites) => {
-  return visites.map(visite => ({
-    'Nom': visite.nom,
-    'Prénom': visite.prenom,
-    'Département': visite.departement,
-    'Fonction': visite.fonction,
-    'Type Visite': visite.typeVisite,
-    'Intitulé': visite.intitule,
-    'Centre Médical': visite.centreMedical,
-    'Date Visite': visite.dateVisite,
-    'Date Expiration': visite.dateExpiration
-  }));
-};
-
-export const formatPlansData = (plans) => {
-  return plans.map(plan => ({
-    'Titre': plan.titre,
-    'Description': plan.description,
-    'Responsable': plan.responsable,
-    'Département': plan.departement,
-    'Date Début': plan.dateDebut,
-    'Date Échéance': plan.dateEcheance,
-    'Priorité': plan.priorite,
-    'Avancement': `${plan.avancement}%`,
-    'Statut': plan.statut,
-    'Processus': plan.processus,
-    'Mesure Efficacité': plan.mesureEfficacite,
-    'Commentaire': plan.commentaire
-  }));
-};
-
-export const formatEPIData = (epiList) => {
-  return epiList.map(epi => ({
-    'Employé': epi.employe,
-    'Département': epi.departement,
-    'Type EPI': epi.typeEPI,
-    'Marque': epi.marque,
-    'Taille': epi.taille,
-    'Date Remise': epi.dateRemise,
-    'Date Expiration': epi.dateExpiration,
-    'Statut': epi.statut
-  }));
-};
-
-export const formatPermisData = (permis) => {
-  return permis.map(permis => ({
-    'Numéro': permis.numero,
-    'Type Travail': permis.typeTravail,
-    'Localisation': permis.localisation,
-    'Demandeur': permis.demandeur,
-    'Exécutant': permis.executant,
-    'Département': permis.departement,
-    'Description Tâche': permis.descriptionTache,
-    'Équipement': permis.equipement,
-    'Date Début': permis.dateDebut,
-    'Date Fin': permis.dateFin,
-    'Heure Début': permis.heureDebut,
-    'Heure Fin': permis.heureFin,
-    'Statut': permis.statut
-  }));
-};
\ No newline at end of file